@@ -2,136 +2,268 @@
 """
 WannabeGit - A lightweight CLI-based version control system
 """
+import os
 import sys
-import argparse
-from wannabegit.commands.init import cmd_init
-from wannabegit.commands.add import cmd_add
-from wannabegit.commands.commit import cmd_commit
-from wannabegit.commands.history import cmd_history
-from wannabegit.commands.revert import cmd_revert
-from wannabegit.commands.diff import cmd_diff
-from wannabegit.commands.status import cmd_status
-from wannabegit.commands.graph import cmd_graph
-from wannabegit.commands.branch import cmd_branch
-from wannabegit.commands.checkout import cmd_checkout
-
-
-def create_parser():
-    """Create and configure argument parser with subcommands"""
-    parser = argparse.ArgumentParser(
-        prog='wannabegit',
-        description='A lightweight version control system',
-        epilog='For more information on a command, use: wannabegit <command> --help'
-    )
-    
-    subparsers = parser.add_subparsers(dest='command', help='Available commands')
-    
-    # init command
-    subparsers.add_parser('init', help='Initialize a new repository')
-    
-    # add command
-    add_parser = subparsers.add_parser('add', help='Add files to staging area')
+import importlib
+from types import SimpleNamespace
+
+
+def _build_add_parser(add_parser):
+    """Add arguments for the add command"""
     add_parser.add_argument('files', nargs='+', help='Files to add')
     add_parser.add_argument('-A', '--all', action='store_true', help='Add all modified files')
-    
-    # commit command
-    commit_parser = subparsers.add_parser('commit', help='Create a new commit')
+
+
+def _build_commit_parser(commit_parser):
+    """Add arguments for the commit command"""
     commit_parser.add_argument('-m', '--message', required=True, help='Commit message')
     commit_parser.add_argument('-a', '--all', action='store_true', help='Commit all tracked files')
-    
-    # history/log command
-    log_parser = subparsers.add_parser('history', aliases=['log'], help='Show commit history')
+
+
+def _build_history_parser(log_parser):
+    """Add arguments for the history/log command"""
     log_parser.add_argument('-n', '--number', type=int, help='Limit number of commits shown')
     log_parser.add_argument('--oneline', action='store_true', help='Show condensed output')
     log_parser.add_argument('--graph', action='store_true', help='Show graph visualization')
-    
-    # revert command
-    revert_parser = subparsers.add_parser('revert', help='Revert to a specific commit')
+
+
+def _build_revert_parser(revert_parser):
+    """Add arguments for the revert command"""
     revert_parser.add_argument('commit_id', help='Commit ID to revert to')
     revert_parser.add_argument('--hard', action='store_true', help='Discard all changes')
-    
-    # diff command
-    diff_parser = subparsers.add_parser('diff', help='Show differences between commits')
+
+
+def _build_diff_parser(diff_parser):
+    """Add arguments for the diff command"""
     diff_parser.add_argument('commit1', nargs='?', help='First commit (default: working directory)')
     diff_parser.add_argument('commit2', nargs='?', help='Second commit (default: HEAD)')
     diff_parser.add_argument('--cached', action='store_true', help='Show staged changes')
-    
-    # status command
-    status_parser = subparsers.add_parser('status', help='Show working tree status')
+
+
+def _build_status_parser(status_parser):
+    """Add arguments for the status command"""
     status_parser.add_argument('-s', '--short', action='store_true', help='Show short format')
-    
-    # branch command
-    branch_parser = subparsers.add_parser('branch', help='List, create, or delete branches')
+
+
+def _build_branch_parser(branch_parser):
+    """Add arguments for the branch command"""
     branch_parser.add_argument('name', nargs='?', help='Branch name to create')
     branch_parser.add_argument('-d', '--delete', help='Delete specified branch')
     branch_parser.add_argument('-l', '--list', action='store_true', help='List all branches')
-    
-    # checkout command
-    checkout_parser = subparsers.add_parser('checkout', help='Switch branches or restore files')
+
+
+def _build_checkout_parser(checkout_parser):
+    """Add arguments for the checkout command"""
     checkout_parser.add_argument('target', help='Branch name or commit ID')
     checkout_parser.add_argument('-b', '--create', action='store_true', help='Create new branch')
+
+
+# Subcommand name -> (help text, aliases, argument builder)
+SUBCMD_BUILDERS = {
+    'init': ('Initialize a new repository', [], None),
+    'add': ('Add files to staging area', [], _build_add_parser),
+    'commit': ('Create a new commit', [], _build_commit_parser),
+    'history': ('Show commit history', ['log'], _build_history_parser),
+    'revert': ('Revert to a specific commit', [], _build_revert_parser),
+    'diff': ('Show differences between commits', [], _build_diff_parser),
+    'status': ('Show working tree status', [], _build_status_parser),
+    'branch': ('List, create, or delete branches', [], _build_branch_parser),
+    'checkout': ('Switch branches or restore files', [], _build_checkout_parser),
+}
+
+
+def create_parser(command=None):
+    """
+    Create and configure argument parser with subcommands
+    
+    Every subcommand is registered so that --help lists them all, but only
+    the arguments of the selected command are built. Passing None builds
+    the arguments of every subcommand.
+    
+    Args:
+        command: Name (or alias) of the subcommand being invoked
+    
+    Returns:
+        Configured ArgumentParser
+    """
+    # Imported here so the fast path in parse_fast() never loads argparse
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog='wannabegit',
+        description='A lightweight version control system',
+        epilog='For more information on a command, use: wannabegit <command> --help'
+    )
+    
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+    
+    for name, (help_text, aliases, builder) in SUBCMD_BUILDERS.items():
+        subparser = subparsers.add_parser(name, aliases=aliases, help=help_text)
+        
+        if builder and (command is None or command == name or command in aliases):
+            builder(subparser)
     
     return parser
 
 
+# Argument shapes understood by parse_fast(), per subcommand:
+# (positionals as (dest, nargs), flags as {flag: (dest, type or None)},
+#  required dests). A None type marks a store_true flag.
+FAST_SPECS = {
+    'init': ([], {}, []),
+    'add': ([('files', '+')], {'-A': ('all', None), '--all': ('all', None)}, []),
+    'commit': ([], {
+        '-m': ('message', str), '--message': ('message', str),
+        '-a': ('all', None), '--all': ('all', None)
+    }, ['message']),
+    'history': ([], {
+        '-n': ('number', int), '--number': ('number', int),
+        '--oneline': ('oneline', None), '--graph': ('graph', None)
+    }, []),
+    'revert': ([('commit_id', 1)], {'--hard': ('hard', None)}, []),
+    'diff': ([('commit1', '?'), ('commit2', '?')], {'--cached': ('cached', None)}, []),
+    'status': ([], {'-s': ('short', None), '--short': ('short', None)}, []),
+    'branch': ([('name', '?')], {
+        '-d': ('delete', str), '--delete': ('delete', str),
+        '-l': ('list', None), '--list': ('list', None)
+    }, []),
+    'checkout': ([('target', 1)], {'-b': ('create', None), '--create': ('create', None)}, []),
+}
+FAST_SPECS['log'] = FAST_SPECS['history']
+
+
+def parse_fast(argv):
+    """
+    Parse the common command line shapes without building argparse
+    
+    Anything unusual (help flags, unknown or combined flags, missing
+    values) returns None so the caller can fall back to the full argparse
+    parser, which also produces the proper error messages. Setting
+    WANNABEGIT_STRICT_ARGPARSE=1 disables this fast path.
+    
+    Args:
+        argv: Command line arguments without the program name
+    
+    Returns:
+        Namespace shaped like argparse's result, or None
+    """
+    if not argv or os.environ.get('WANNABEGIT_STRICT_ARGPARSE') == '1':
+        return None
+    
+    spec = FAST_SPECS.get(argv[0])
+    if spec is None:
+        return None
+    
+    positionals, flags, required = spec
+    values = {dest: (False if kind is None else None) for dest, kind in flags.values()}
+    remaining = []
+    
+    args = iter(argv[1:])
+    for arg in args:
+        if not arg.startswith('-') or arg == '-':
+            remaining.append(arg)
+            continue
+        
+        if arg not in flags:
+            return None
+        
+        dest, kind = flags[arg]
+        if kind is None:
+            values[dest] = True
+            continue
+        
+        value = next(args, None)
+        if value is None or value.startswith('-'):
+            return None
+        try:
+            values[dest] = kind(value)
+        except ValueError:
+            return None
+    
+    for dest, nargs in positionals:
+        if nargs == '+':
+            if not remaining:
+                return None
+            values[dest], remaining = remaining, []
+        elif nargs == '?':
+            values[dest] = remaining.pop(0) if remaining else None
+        elif remaining:
+            values[dest] = remaining.pop(0)
+        else:
+            return None
+    
+    if remaining or any(values[dest] is None for dest in required):
+        return None
+    
+    return SimpleNamespace(command=argv[0], **values)
+
+
+def _lazy(module, name):
+    """Import a command handler from wannabegit.commands on first use"""
+    return getattr(importlib.import_module(f'wannabegit.commands.{module}'), name)
+
+
+def _dispatch_add(args):
+    """Route the add command"""
+    cmd_add = _lazy('add', 'cmd_add')
+    if args.all:
+        return cmd_add('.', add_all=True)
+    return cmd_add(args.files)
+
+
+def _dispatch_history(args):
+    """Route the history/log command"""
+    if args.graph:
+        return _lazy('graph', 'cmd_graph')(limit=args.number)
+    return _lazy('history', 'cmd_history')(limit=args.number, oneline=args.oneline)
+
+
+def _dispatch_branch(args):
+    """Route the branch command"""
+    if args.delete:
+        return _lazy('branch', 'cmd_branch_delete')(args.delete)
+    elif args.name:
+        return _lazy('branch', 'cmd_branch')(args.name)
+    return _lazy('branch', 'cmd_branch_list')()
+
+
+# Command name -> handler taking the parsed arguments. Handlers import
+# their command module only when dispatched to.
+DISPATCH = {
+    'init': lambda args: _lazy('init', 'cmd_init')(),
+    'add': _dispatch_add,
+    'commit': lambda args: _lazy('commit', 'cmd_commit')(args.message, commit_all=args.all),
+    'history': _dispatch_history,
+    'log': _dispatch_history,
+    'revert': lambda args: _lazy('revert', 'cmd_revert')(args.commit_id, hard=args.hard),
+    'diff': lambda args: _lazy('diff', 'cmd_diff')(args.commit1, args.commit2, cached=args.cached),
+    'status': lambda args: _lazy('status', 'cmd_status')(short=args.short),
+    'branch': _dispatch_branch,
+    'checkout': lambda args: _lazy('checkout', 'cmd_checkout')(args.target, create_branch=args.create),
+}
+
+
 def main():
     """Main entry point for WannabeGit CLI"""
-    parser = create_parser()
-    
     if len(sys.argv) == 1:
-        parser.print_help()
+        create_parser('').print_help()
         return 0
     
-    args = parser.parse_args()
+    args = parse_fast(sys.argv[1:])
+    
+    if args is None:
+        # Only the invoked subcommand gets its arguments built
+        args = create_parser(sys.argv[1]).parse_args()
+    
+    handler = DISPATCH.get(args.command)
     
     try:
-        # Route to appropriate command handler
-        if args.command == 'init':
-            return cmd_init()
-        
-        elif args.command == 'add':
-            if args.all:
-                return cmd_add('.', add_all=True)
-            else:
-                for file in args.files:
-                    cmd_add(file)
-                return 0
-        
-        elif args.command == 'commit':
-            return cmd_commit(args.message, commit_all=args.all)
-        
-        elif args.command in ['history', 'log']:
-            if args.graph:
-                return cmd_graph(limit=args.number)
-            else:
-                return cmd_history(limit=args.number, oneline=args.oneline)
-        
-        elif args.command == 'revert':
-            return cmd_revert(args.commit_id, hard=args.hard)
-        
-        elif args.command == 'diff':
-            return cmd_diff(args.commit1, args.commit2, cached=args.cached)
-        
-        elif args.command == 'status':
-            return cmd_status(short=args.short)
-        
-        elif args.command == 'branch':
-            if args.delete:
-                from wannabegit.commands.branch import cmd_branch_delete
-                return cmd_branch_delete(args.delete)
-            elif args.name:
-                return cmd_branch(args.name)
-            else:
-                from wannabegit.commands.branch import cmd_branch_list
-                return cmd_branch_list()
+        if handler is None:
+            create_parser().print_help()
+            return 1
         
-        elif args.command == 'checkout':
-            return cmd_checkout(args.target, create_branch=args.create)
+        return handler(args)
         
-        else:
-            parser.print_help()
-            return 1
-            
     except KeyboardInterrupt:
         print("\n\nOperation cancelled by user.")
         return 130
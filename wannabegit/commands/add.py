@@ -2,124 +2,268 @@
 Enhanced file staging with pattern matching and recursive directory support
 """
 import os
-import glob
-from pathlib import Path
-from typing import List
+import re
+import stat
+import fnmatch
+from typing import Iterator, List, Optional, Tuple, Union
 from wannabegit.core import (
-    Repository, INDEX_FILE, read_json, write_json, get_file_hash
+    Repository, hash_files, stat_info,
+    get_recorded_hash
 )
 from wannabegit.ignore import IgnoreManager
 
+# (path, stat result or None if missing)
+FileEntry = Tuple[str, Optional[os.stat_result]]
 
-def expand_file_patterns(patterns: List[str]) -> List[str]:
-    """Expand file patterns including wildcards and directories"""
-    files = []
+
+def _stat(path: str) -> Optional[os.stat_result]:
+    """Stat a path, returning None if it does not exist"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def _scan_directory(directory: str, ignore_manager: IgnoreManager = None) -> Iterator[FileEntry]:
+    """Recursively yield files under directory, pruning ignored subtrees"""
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    # Never descend into an ignored directory
+                    if ignore_manager and ignore_manager.is_ignored(entry.path, is_dir=True):
+                        continue
+                    yield from _scan_directory(entry.path, ignore_manager)
+                else:
+                    try:
+                        yield entry.path, entry.stat()
+                    except OSError:
+                        yield entry.path, None
+    except OSError:
+        return
+
+
+def _has_magic(part: str) -> bool:
+    """Check whether a path component contains glob wildcards"""
+    return any(c in part for c in "*?[")
+
+
+def _match_glob_parts(base: str, parts: List[str],
+                      ignore_manager: IgnoreManager = None) -> Iterator[str]:
+    """
+    Match the remaining glob components below base
+    
+    Follows glob.glob(recursive=True) semantics: '**' spans zero or more
+    directories and hidden names only match components starting with '.'.
+    Ignored directories are never descended into.
+    """
+    if not parts:
+        if base:
+            yield base
+        return
     
+    part, rest = parts[0], parts[1:]
+    
+    if not _has_magic(part):
+        path = os.path.join(base, part)
+        if not rest:
+            if os.path.lexists(path):
+                yield path
+        elif os.path.isdir(path):
+            yield from _match_glob_parts(path, rest, ignore_manager)
+        return
+    
+    if part == "**":
+        # Zero directories, then every non-hidden subdirectory
+        yield from _match_glob_parts(base, rest, ignore_manager)
+    else:
+        regex = re.compile(fnmatch.translate(part))
+    
+    try:
+        with os.scandir(base or os.curdir) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") and not part.startswith("."):
+                    continue
+                
+                path = os.path.join(base, entry.name)
+                is_dir = entry.is_dir()
+                
+                if part == "**":
+                    if is_dir and not entry.is_symlink() and not (
+                            ignore_manager and ignore_manager.is_ignored(path, is_dir=True)):
+                        yield from _match_glob_parts(path, parts, ignore_manager)
+                    elif not rest:
+                        yield path
+                    continue
+                
+                if not regex.match(entry.name):
+                    continue
+                
+                if not rest:
+                    yield path
+                elif is_dir and not (ignore_manager and ignore_manager.is_ignored(path, is_dir=True)):
+                    yield from _match_glob_parts(path, rest, ignore_manager)
+    except OSError:
+        return
+
+
+def _expand_glob(pattern: str, ignore_manager: IgnoreManager = None) -> Iterator[str]:
+    """Expand a glob pattern with os.scandir, pruning ignored directories"""
+    parts = pattern.replace(os.sep, "/").split("/")
+    base = ""
+    
+    if parts[0] == "":
+        # Absolute pattern
+        base, parts = os.sep, parts[1:]
+    
+    seen = set()
+    for path in _match_glob_parts(base, [p for p in parts if p], ignore_manager):
+        if path not in seen:
+            seen.add(path)
+            yield path
+
+
+def expand_file_patterns(patterns: List[str],
+                         ignore_manager: IgnoreManager = None) -> Iterator[FileEntry]:
+    """
+    Expand file patterns including wildcards and directories
+    
+    Directories are walked lazily with os.scandir; when an ignore manager
+    is given, ignored directories are skipped without being traversed.
+    
+    Returns:
+        Iterator of (path, stat result) pairs; the stat result is None for
+        paths that do not exist
+    """
     for pattern in patterns:
-        if os.path.isdir(pattern):
-            # Add all files in directory recursively
-            for root, _, filenames in os.walk(pattern):
-                for filename in filenames:
-                    files.append(os.path.join(root, filename))
-        elif '*' in pattern or '?' in pattern:
+        if '*' in pattern or '?' in pattern:
             # Expand glob pattern
-            files.extend(glob.glob(pattern, recursive=True))
-        elif os.path.isfile(pattern):
-            files.append(pattern)
+            for path in _expand_glob(pattern, ignore_manager):
+                yield path, _stat(path)
+            continue
+        
+        st = _stat(pattern)
+        if st and stat.S_ISDIR(st.st_mode):
+            # Add all files in directory recursively
+            yield from _scan_directory(pattern, ignore_manager)
         else:
-            # File doesn't exist yet, might be created
-            files.append(pattern)
-    
-    return files
+            # Might not exist yet; cmd_add reports missing files
+            yield pattern, st
 
 
-def cmd_add(file_path: str, add_all: bool = False) -> int:
+def cmd_add(file_path: Union[str, List[str]], add_all: bool = False) -> int:
     """
     Add files to staging area
     
+    The repository, ignore rules and index are loaded once and the index
+    is written once, however many paths are given.
+    
     Args:
-        file_path: File path or pattern to add
+        file_path: File path or pattern to add, or a list of them
         add_all: If True, add all modified tracked files
     
     Returns:
         0 on success, 1 on error
     """
-    repo = Repository()
-    
     try:
-        repo.ensure_exists()
+        repo = Repository.instance()
     except Exception as e:
         print(f"Error: {e}")
         return 1
     
     ignore_manager = IgnoreManager()
-    index = read_json(INDEX_FILE, {
-        "tracked_files": [],
-        "staged_files": {},
-        "version": "1.0"
-    })
+    index = repo.load_index()
     
     # Ensure staged_files exists
     if "staged_files" not in index:
         index["staged_files"] = {}
     
-    files_to_add = []
-    
     if add_all:
         # Add all modified tracked files
+        files_to_add = []
         for tracked_file in index["tracked_files"]:
-            if os.path.exists(tracked_file):
-                files_to_add.append(tracked_file)
+            st = _stat(tracked_file)
+            if st:
+                files_to_add.append((tracked_file, st))
     else:
         # Expand patterns
-        files_to_add = expand_file_patterns([file_path])
+        patterns = [file_path] if isinstance(file_path, str) else file_path
+        files_to_add = expand_file_patterns(patterns, ignore_manager)
+    
+    # Normalize paths and drop ignored ones in a single pass; the stat
+    # taken while expanding tells directories apart without another one
+    candidates = [(os.path.normpath(file), st) for file, st in files_to_add]
+    files_to_add = [
+        (file, st) for file, st in candidates
+        if not ignore_manager.is_ignored(
+            file, is_dir=stat.S_ISDIR(st.st_mode) if st is not None else None
+        )
+    ]
     
     added_count = 0
-    ignored_count = 0
+    ignored_count = len(candidates) - len(files_to_add)
     error_count = 0
     
-    for file in files_to_add:
-        # Normalize path
-        file = os.path.normpath(file)
-        
-        # Check if ignored
-        if ignore_manager.is_ignored(file):
-            ignored_count += 1
-            continue
-        
+    to_hash = []
+    stats = {}
+    hashes = {}
+    records = index.get("file_stats", {})
+    staged = index["staged_files"]
+    
+    # Reuse the stat results gathered during expansion
+    for file, st in files_to_add:
         # Check if file exists
-        if not os.path.exists(file):
+        if st is None:
             print(f"Error: '{file}' does not exist")
             error_count += 1
             continue
         
         # Skip directories
-        if os.path.isdir(file):
+        if stat.S_ISDIR(st.st_mode):
             continue
         
-        # Add to tracking list if not already there
-        if file not in index["tracked_files"]:
-            index["tracked_files"].append(file)
+        stats[file] = st
         
-        # Stage the file with its current hash
-        try:
-            file_hash = get_file_hash(file)
-            index["staged_files"][file] = {
-                "hash": file_hash,
-                "status": "added" if file not in index["tracked_files"] else "modified"
-            }
-            added_count += 1
-        except IOError as e:
-            print(f"Error reading '{file}': {e}")
+        # Files unchanged since they were last staged or committed keep
+        # their recorded hash instead of being read again
+        recorded = get_recorded_hash(file, staged.get(file) or records.get(file), st)
+        if recorded:
+            hashes[file] = recorded
+        else:
+            to_hash.append(file)
+    
+    tracked_set = set(index["tracked_files"])
+    
+    # Hash in parallel, then update the index from this thread only
+    hashes.update(hash_files(to_hash))
+    for file in stats:
+        file_hash = hashes[file]
+        if not file_hash:
+            print(f"Error reading '{file}'")
             error_count += 1
             continue
+        
+        # Decide the status before the file is added to the tracking list
+        is_new = file not in tracked_set
+        if is_new:
+            index["tracked_files"].append(file)
+            tracked_set.add(file)
+        
+        # Stage the file with its current hash
+        index["staged_files"][file] = {
+            "hash": file_hash,
+            "status": "added" if is_new else "modified",
+            **stat_info(stats[file])
+        }
+        added_count += 1
     
-    # Save updated index
-    try:
-        write_json(INDEX_FILE, index)
-    except Exception as e:
-        print(f"Error saving index: {e}")
-        return 1
+    # Save updated index (only when something was staged)
+    if added_count > 0:
+        try:
+            repo.save_index(index)
+        except Exception as e:
+            print(f"Error saving index: {e}")
+            return 1
     
     # Report results
     if added_count > 0:
@@ -140,22 +284,17 @@ def cmd_add(file_path: str, add_all: bool = False) -> int:
 
 def cmd_unstage(file_path: str) -> int:
     """Remove file from staging area (keep tracking)"""
-    repo = Repository()
-    
     try:
-        repo.ensure_exists()
+        repo = Repository.instance()
     except Exception as e:
         print(f"Error: {e}")
         return 1
     
-    index = read_json(INDEX_FILE, {
-        "tracked_files": [],
-        "staged_files": {}
-    })
+    index = repo.load_index()
     
     if file_path in index.get("staged_files", {}):
         del index["staged_files"][file_path]
-        write_json(INDEX_FILE, index)
+        repo.save_index(index)
         print(f"Unstaged '{file_path}'")
         return 0
     else:
@@ -2,6 +2,7 @@
 Complete branch management with create, list, and delete operations
 """
 import os
+import sys
 from wannabegit.core import Repository
 from wannabegit.diff_engine import Colors
 
@@ -16,10 +17,8 @@ def cmd_branch(name: str) -> int:
     Returns:
         0 on success, 1 on error
     """
-    repo = Repository()
-    
     try:
-        repo.ensure_exists()
+        repo = Repository.instance()
     except Exception as e:
         print(f"Error: {e}")
         return 1
@@ -44,10 +43,8 @@ def cmd_branch(name: str) -> int:
         return 1
     
     # Create branch reference
-    branch_file = repo.refs_dir / name
-    
     try:
-        branch_file.write_text(f"{head_commit}\n")
+        repo.set_branch(name, head_commit)
         print(f"Created branch '{Colors.GREEN}{name}{Colors.RESET}' at {head_commit[:8]}")
         return 0
     
@@ -58,10 +55,8 @@ def cmd_branch(name: str) -> int:
 
 def cmd_branch_list() -> int:
     """List all branches with current branch highlighted"""
-    repo = Repository()
-    
     try:
-        repo.ensure_exists()
+        repo = Repository.instance()
     except Exception as e:
         print(f"Error: {e}")
         return 1
@@ -75,18 +70,22 @@ def cmd_branch_list() -> int:
             print("Create a branch with: wannabegit branch <name>")
         return 0
     
-    print(f"{Colors.BOLD}Branches:{Colors.RESET}")
+    # Build the whole listing and write it out at once
+    lines = [f"{Colors.BOLD}Branches:{Colors.RESET}"]
     
-    for branch in sorted(branches):
+    branches.sort()
+    for branch in branches:
         if branch == current_branch:
-            print(f"{Colors.GREEN}* {branch}{Colors.RESET} (current)")
+            lines.append(f"{Colors.GREEN}* {branch}{Colors.RESET} (current)")
         else:
-            print(f"  {branch}")
+            lines.append(f"  {branch}")
     
     # Show detached HEAD warning
     if not current_branch:
         head = repo.get_head()
-        print(f"\n{Colors.YELLOW}Currently in detached HEAD state at {head[:8] if head else 'unknown'}{Colors.RESET}")
+        lines.append(f"\n{Colors.YELLOW}Currently in detached HEAD state at {head[:8] if head else 'unknown'}{Colors.RESET}")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
     
     return 0
 
@@ -101,10 +100,8 @@ def cmd_branch_delete(name: str) -> int:
     Returns:
         0 on success, 1 on error
     """
-    repo = Repository()
-    
     try:
-        repo.ensure_exists()
+        repo = Repository.instance()
     except Exception as e:
         print(f"Error: {e}")
         return 1
@@ -122,10 +119,8 @@ def cmd_branch_delete(name: str) -> int:
         return 1
     
     # Delete branch file
-    branch_file = repo.refs_dir / name
-    
     try:
-        branch_file.unlink()
+        repo.delete_branch(name)
         print(f"Deleted branch '{Colors.RED}{name}{Colors.RESET}'")
         return 0
     
@@ -145,10 +140,8 @@ def cmd_branch_rename(old_name: str, new_name: str) -> int:
     Returns:
         0 on success, 1 on error
     """
-    repo = Repository()
-    
     try:
-        repo.ensure_exists()
+        repo = Repository.instance()
     except Exception as e:
         print(f"Error: {e}")
         return 1
@@ -162,19 +155,9 @@ def cmd_branch_rename(old_name: str, new_name: str) -> int:
         print(f"Error: Branch '{new_name}' already exists")
         return 1
     
-    # Rename branch
-    old_file = repo.refs_dir / old_name
-    new_file = repo.refs_dir / new_name
-    
+    # Rename branch (HEAD follows if this was the current branch)
     try:
-        old_file.rename(new_file)
-        
-        # Update HEAD if this was the current branch
-        current_branch = repo.get_current_branch()
-        if current_branch == old_name:
-            head_file = repo.vcs_dir / "HEAD"
-            head_file.write_text(f"ref: refs/heads/{new_name}\n")
-        
+        repo.rename_branch(old_name, new_name)
         print(f"Renamed branch '{old_name}' to '{new_name}'")
         return 0
     
@@ -2,69 +2,91 @@
 Enhanced checkout command with safety checks and file restoration
 """
 import os
-import shutil
-from wannabegit.core import Repository, COMMITS_DIR, read_json, INDEX_FILE
+from wannabegit.core import (
+    Repository, commit_dir, commit_exists, get_file_hash,
+    stat_matches, make_parent_dirs, copy_file, copy_files, commit_file_paths,
+    commit_file_modes, commit_is_compressed, load_commit_meta
+)
 from wannabegit.diff_engine import Colors
 
 
 def has_uncommitted_changes() -> bool:
-    """Check if there are uncommitted changes in working directory"""
-    repo = Repository()
+    """
+    Check if there are uncommitted changes in working directory
+    
+    Files whose stat info still matches what the index recorded when they
+    were committed at HEAD are treated as clean without being read. Other
+    files are compared by size first and only hashed when the sizes match.
+    """
+    repo = Repository.instance()
     head_commit = repo.get_head()
     
     if not head_commit:
         return False
     
-    index = read_json(INDEX_FILE, {"tracked_files": []})
+    index = repo.load_index()
     tracked = index.get("tracked_files", [])
+    file_stats = index.get("file_stats", {})
     
-    commit_path = os.path.join(COMMITS_DIR, head_commit)
+    commit_path = commit_dir(head_commit)
+    meta = load_commit_meta(head_commit)
+    committed_files = commit_file_paths(commit_path, meta)
     
     for file in tracked:
-        if not os.path.exists(file):
+        try:
+            st = os.stat(file)
+        except OSError:
             return True
         
-        committed_file = os.path.join(commit_path, file)
-        if not os.path.exists(committed_file):
+        record = file_stats.get(file)
+        if record and record.get("commit") == head_commit and stat_matches(record, st):
             continue
         
-        try:
-            with open(file, 'rb') as f:
-                working = f.read()
-            with open(committed_file, 'rb') as f:
-                committed = f.read()
-            
-            if working != committed:
+        # Commits with a tree already record each file's hash
+        committed_hash = meta.get("tree", {}).get(file)
+        if committed_hash is not None:
+            if get_file_hash(file) != committed_hash:
                 return True
-        except IOError:
             continue
+        
+        working_size = st.st_size
+        committed_file = committed_files.get(file)
+        if committed_file is None:
+            continue
+        try:
+            committed_size = os.stat(committed_file).st_size
+        except OSError:
+            continue
+        
+        if working_size != committed_size:
+            return True
+        
+        if get_file_hash(file) != get_file_hash(committed_file):
+            return True
     
     return False
 
 
 def restore_files_from_commit(commit_id: str, force: bool = False) -> bool:
     """Restore files from a commit to working directory"""
-    commit_path = os.path.join(COMMITS_DIR, commit_id)
-    
-    if not os.path.exists(commit_path):
+    if not commit_exists(commit_id):
         return False
     
-    meta = read_json(os.path.join(commit_path, "meta.json"), {})
-    files = meta.get("files", [])
+    commit_path = commit_dir(commit_id)
     
-    for file in files:
-        src = os.path.join(commit_path, file)
-        dst = file
-        
-        if not os.path.exists(src):
-            continue
-        
-        try:
-            # Create parent directories if needed
-            os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
-            shutil.copy2(src, dst)
-        except IOError as e:
-            print(f"Warning: Could not restore '{file}': {e}")
+    meta = load_commit_meta(commit_id)
+    stored = commit_file_paths(commit_path, meta)
+    modes = commit_file_modes(meta, stored)
+    copies = [(src, file, modes.get(file)) for file, src in stored.items()]
+    
+    # Create parent directories once, then copy in parallel
+    try:
+        make_parent_dirs(stored)
+    except OSError as e:
+        print(f"Warning: Could not create directories: {e}")
+    
+    for file, error in copy_files(copies, commit_is_compressed(meta)).items():
+        print(f"Warning: Could not restore '{file}': {error}")
     
     return True
 
@@ -81,10 +103,8 @@ def cmd_checkout(target: str, create_branch: bool = False, force: bool = False)
     Returns:
         0 on success, 1 on error
     """
-    repo = Repository()
-    
     try:
-        repo.ensure_exists()
+        repo = Repository.instance()
     except Exception as e:
         print(f"Error: {e}")
         return 1
@@ -112,15 +132,13 @@ def cmd_checkout(target: str, create_branch: bool = False, force: bool = False)
             return 1
         
         # Create branch
-        branch_file = repo.refs_dir / target
-        branch_file.write_text(f"{head_commit}\n")
+        repo.set_branch(target, head_commit)
         print(f"Created new branch '{Colors.GREEN}{target}{Colors.RESET}'")
     
     # Check if target is a branch
     if repo.branch_exists(target):
         # Switching to existing branch
-        branch_file = repo.refs_dir / target
-        commit_id = branch_file.read_text().strip()
+        commit_id = repo.get_branch_commit(target)
         
         if not commit_id:
             print(f"Error: Branch '{target}' has no commits")
@@ -135,13 +153,12 @@ def cmd_checkout(target: str, create_branch: bool = False, force: bool = False)
         repo.set_head(commit_id, target)
         
         # Update index with tracked files from commit
-        meta = read_json(os.path.join(COMMITS_DIR, commit_id, "meta.json"), {})
-        index = read_json(INDEX_FILE, {"tracked_files": [], "staged_files": {}})
-        index["tracked_files"] = meta.get("files", [])
+        meta = load_commit_meta(commit_id)
+        index = repo.load_index()
+        index["tracked_files"] = list(meta.get("files", []))
         index["staged_files"] = {}  # Clear staging area
         
-        from wannabegit.core import write_json
-        write_json(INDEX_FILE, index)
+        repo.save_index(index)
         
         if current_branch:
             print(f"Switched from branch '{current_branch}' to '{Colors.CYAN}{target}{Colors.RESET}'")
@@ -151,9 +168,7 @@ def cmd_checkout(target: str, create_branch: bool = False, force: bool = False)
         return 0
     
     # Check if target is a commit ID
-    commit_path = os.path.join(COMMITS_DIR, target)
-    
-    if os.path.exists(commit_path):
+    if commit_exists(target):
         # Detached HEAD checkout
         if not restore_files_from_commit(target, force):
             print(f"Error: Could not restore files from commit '{target}'")
@@ -163,13 +178,12 @@ def cmd_checkout(target: str, create_branch: bool = False, force: bool = False)
         repo.set_head(target)
         
         # Update index
-        meta = read_json(os.path.join(commit_path, "meta.json"), {})
-        index = read_json(INDEX_FILE, {"tracked_files": [], "staged_files": {}})
-        index["tracked_files"] = meta.get("files", [])
+        meta = load_commit_meta(target)
+        index = repo.load_index()
+        index["tracked_files"] = list(meta.get("files", []))
         index["staged_files"] = {}
         
-        from wannabegit.core import write_json
-        write_json(INDEX_FILE, index)
+        repo.save_index(index)
         
         print(f"{Colors.YELLOW}Note: Switching to '{target[:8]}'.{Colors.RESET}")
         print(f"You are in 'detached HEAD' state.")
@@ -203,10 +217,8 @@ def cmd_checkout_file(file_path: str, commit_id: str = None) -> int:
     Returns:
         0 on success, 1 on error
     """
-    repo = Repository()
-    
     try:
-        repo.ensure_exists()
+        repo = Repository.instance()
     except Exception as e:
         print(f"Error: {e}")
         return 1
@@ -217,21 +229,29 @@ def cmd_checkout_file(file_path: str, commit_id: str = None) -> int:
             print("Error: No commits yet")
             return 1
     
-    commit_path = os.path.join(COMMITS_DIR, commit_id)
-    
-    if not os.path.exists(commit_path):
+    if not commit_exists(commit_id):
         print(f"Error: Commit '{commit_id}' not found")
         return 1
     
-    src_file = os.path.join(commit_path, file_path)
+    commit_path = commit_dir(commit_id)
+    
+    meta = load_commit_meta(commit_id)
+    stored = commit_file_paths(commit_path, meta)
+    file = os.path.normpath(file_path)
+    src_file = stored.get(file)
     
-    if not os.path.exists(src_file):
+    if not src_file or not os.path.exists(src_file):
         print(f"Error: File '{file_path}' not found in commit '{commit_id[:8]}'")
         return 1
     
     try:
-        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
-        shutil.copy2(src_file, file_path)
+        parent = os.path.dirname(file_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        copy_file(
+            src_file, file_path, commit_file_modes(meta, stored).get(file),
+            commit_is_compressed(meta)
+        )
         print(f"Restored '{file_path}' from {commit_id[:8]}")
         return 0
     
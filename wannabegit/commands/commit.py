@@ -3,10 +3,13 @@ Enhanced commit command with parent tracking and better metadata
 """
 import os
 import shutil
+import stat
 from datetime import datetime
+from typing import Dict, Optional
 from wannabegit.core import (
-    Repository, COMMITS_DIR, INDEX_FILE, read_json, write_json,
-    generate_commit_id, format_timestamp, get_file_hash
+    Repository, commit_dir, write_json,
+    generate_commit_id, format_timestamp, hash_files, stat_info,
+    store_objects, load_commit_meta
 )
 
 
@@ -30,20 +33,14 @@ def cmd_commit(message: str, commit_all: bool = False) -> int:
         return 1
     
     # Load index
-    index = read_json(INDEX_FILE, {
-        "tracked_files": [],
-        "staged_files": {}
-    })
+    index = repo.load_index()
     
     # If commit_all, stage all tracked files
     if commit_all:
         for tracked_file in index["tracked_files"]:
+            # Hashed below along with everything else that is committed
             if os.path.exists(tracked_file):
-                file_hash = get_file_hash(tracked_file)
-                index["staged_files"][tracked_file] = {
-                    "hash": file_hash,
-                    "status": "modified"
-                }
+                index["staged_files"][tracked_file] = {"status": "modified"}
     
     staged_files = index.get("staged_files", {})
     
@@ -52,6 +49,17 @@ def cmd_commit(message: str, commit_all: bool = False) -> int:
         print("Use 'wannabegit add <file>' to stage files")
         return 1
     
+    # Get config for author info and blob compression
+    config = repo.get_config()
+    compression = config.get("core", {}).get("compression", 0) or 0
+    try:
+        level = int(compression)
+    except (TypeError, ValueError):
+        level = -1
+    if not 0 <= level <= 9:
+        print(f"Error: core.compression must be a number from 0 to 9, got {compression!r}")
+        return 1
+    
     # Get parent commit
     parent_commit = repo.get_head()
     current_branch = repo.get_current_branch()
@@ -61,24 +69,45 @@ def cmd_commit(message: str, commit_all: bool = False) -> int:
     commit_id = generate_commit_id(message, timestamp, parent_commit)
     
     # Create commit directory
-    commit_path = os.path.join(COMMITS_DIR, commit_id)
+    commit_path = commit_dir(commit_id)
     
     try:
         os.makedirs(commit_path, exist_ok=True)
         
-        # Copy staged files to commit
+        # Store staged files as blobs; the commit only records their hashes
+        stats = {}
+        for file_path in staged_files:
+            try:
+                stats[file_path] = os.stat(file_path)
+            except OSError:
+                continue
+        
+        # Every file is hashed again rather than trusting the hash taken at
+        # staging time: its current bytes are what gets stored under the
+        # hash, so the two must agree even if the file changed without its
+        # stat info moving
+        files_present = list(stats)
+        modes = {}
+        for file_path, sha in hash_files(files_present).items():
+            if not sha:
+                raise OSError(f"Could not read '{file_path}'")
+            st = stats[file_path]
+            staged_files[file_path].update(hash=sha, **stat_info(st))
+            modes[file_path] = stat.S_IMODE(st.st_mode)
+        
         files_committed = []
-        for file_path in staged_files.keys():
-            if os.path.exists(file_path):
-                # Preserve directory structure
-                rel_path = os.path.relpath(file_path)
-                dest_path = os.path.join(commit_path, rel_path)
-                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                shutil.copy2(file_path, dest_path)
-                files_committed.append(rel_path)
-        
-        # Get config for author info
-        config = repo.get_config()
+        tree = {}
+        tree_modes = {}
+        for file_path in files_present:
+            rel_path = os.path.relpath(file_path)
+            tree[rel_path] = staged_files[file_path]["hash"]
+            tree_modes[rel_path] = modes[file_path]
+            files_committed.append(rel_path)
+        
+        store_objects([
+            (file_path, staged_files[file_path]["hash"]) for file_path in files_present
+        ], level=level)
+        
         user_name = config.get("user", {}).get("name", "Unknown")
         user_email = config.get("user", {}).get("email", "unknown@localhost")
         
@@ -94,6 +123,9 @@ def cmd_commit(message: str, commit_all: bool = False) -> int:
             "parent": parent_commit,
             "branch": current_branch or "detached",
             "files": files_committed,
+            "tree": tree,
+            "modes": tree_modes,
+            "compressed": bool(level),
             "stats": {
                 "files_changed": len(files_committed),
                 "total_files": len(files_committed)
@@ -106,9 +138,23 @@ def cmd_commit(message: str, commit_all: bool = False) -> int:
         # Update HEAD
         repo.set_head(commit_id, current_branch)
         
+        # Remember the stat info of files committed unchanged since staging,
+        # so later checks can treat them as clean without reading them
+        file_stats = index.setdefault("file_stats", {})
+        for file_path in files_committed:
+            entry = staged_files.get(file_path, {})
+            if "mtime_ns" in entry:
+                file_stats[file_path] = {
+                    "hash": entry["hash"],
+                    "size": entry["size"],
+                    "mtime_ns": entry["mtime_ns"],
+                    "ino": entry["ino"],
+                    "commit": commit_id
+                }
+        
         # Clear staging area but keep tracked files
         index["staged_files"] = {}
-        write_json(INDEX_FILE, index)
+        repo.save_index(index)
         
         # Print success message
         branch_info = f"[{current_branch}]" if current_branch else "[detached HEAD]"
@@ -134,12 +180,18 @@ def cmd_commit(message: str, commit_all: bool = False) -> int:
 
 def get_commit_metadata(commit_id: str) -> dict:
     """Load commit metadata from commit ID"""
-    meta_path = os.path.join(COMMITS_DIR, commit_id, "meta.json")
-    return read_json(meta_path, {})
+    return load_commit_meta(commit_id)
 
 
-def get_commit_tree(commit_id: str) -> list:
-    """Get list of commits from commit to root"""
+def get_commit_tree(commit_id: str, graph: Optional[Dict[str, dict]] = None) -> list:
+    """
+    Get list of commits from commit to root
+    
+    Args:
+        commit_id: Commit to start from
+        graph: Commit graph from build_commit_graph; when given, its
+            entries are returned instead of loading each commit's metadata
+    """
     tree = []
     current = commit_id
     
@@ -147,7 +199,10 @@ def get_commit_tree(commit_id: str) -> list:
     
     while current and current not in visited:
         visited.add(current)
-        metadata = get_commit_metadata(current)
+        if graph is not None:
+            metadata = graph.get(current)
+        else:
+            metadata = get_commit_metadata(current)
         
         if not metadata:
             break
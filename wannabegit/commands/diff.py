@@ -1,9 +1,18 @@
 """
 Enhanced diff command with multiple comparison modes
 """
+import io
 import os
-from wannabegit.core import Repository, COMMITS_DIR, INDEX_FILE, read_json
-from wannabegit.diff_engine import generate_diff, get_diff_stats, Colors
+import sys
+from typing import Dict, Iterable, Optional, Set
+from wannabegit.core import (
+    Repository, commit_dir, commit_exists, commit_file_paths, load_commit_meta,
+    stat_matches, open_content, commit_is_compressed
+)
+from wannabegit.diff_engine import generate_diff, iter_diff_lines, Colors
+
+# Files are read whole, so use a larger buffer than the 8 KiB default
+READ_BUFFER_SIZE = 256 * 1024
 
 
 def cmd_diff(commit1: str = None, commit2: str = None, cached: bool = False) -> int:
@@ -49,111 +58,194 @@ def cmd_diff(commit1: str = None, commit2: str = None, cached: bool = False) ->
         return diff_commit_working(head_commit)
 
 
+def _count_lines(path: str, compressed: bool = False) -> int:
+    """Count lines in a file by scanning fixed-size byte chunks"""
+    count = 0
+    last = b""
+    with open_content(path, compressed) as f:
+        for chunk in iter(lambda: f.read(READ_BUFFER_SIZE), b""):
+            count += chunk.count(b"\n")
+            last = chunk
+    
+    # A final line without a newline still counts
+    if last and not last.endswith(b"\n"):
+        count += 1
+    return count
+
+
+def _same_content(path1: str, path2: str,
+                  compressed1: bool = False, compressed2: bool = False) -> bool:
+    """Compare two files byte for byte, stopping at the first difference"""
+    # Sizes on disk only tell the contents apart when neither is compressed
+    if (not compressed1 and not compressed2
+            and os.path.getsize(path1) != os.path.getsize(path2)):
+        return False
+    
+    with open_content(path1, compressed1) as f1, open_content(path2, compressed2) as f2:
+        while True:
+            chunk1 = f1.read(READ_BUFFER_SIZE)
+            if chunk1 != f2.read(READ_BUFFER_SIZE):
+                return False
+            if not chunk1:
+                return True
+
+
+def _read_text(path: str, compressed: bool = False) -> str:
+    """Read a file or stored blob as text, with universal newlines"""
+    with io.TextIOWrapper(open_content(path, compressed), encoding='utf-8') as f:
+        return f.read()
+
+
+def _matches_record(path: str, record: Optional[dict], sha: Optional[str]) -> bool:
+    """
+    Check from the index alone that a working file has the given content
+    
+    True when the index recorded the same hash for the file and its stat
+    info has not changed since, so neither file needs to be read.
+    """
+    if not record or not sha or record.get("hash") != sha:
+        return False
+    try:
+        return stat_matches(record, os.stat(path))
+    except OSError:
+        return False
+
+
+def _existing_files(files: Iterable[str]) -> Set[str]:
+    """Find which of the given files exist, with one scandir per directory"""
+    by_dir: Dict[str, Set[str]] = {}
+    for file in files:
+        by_dir.setdefault(os.path.dirname(file), set()).add(file)
+    
+    found = set()
+    for directory, wanted in by_dir.items():
+        try:
+            with os.scandir(directory or os.curdir) as entries:
+                for entry in entries:
+                    path = os.path.join(directory, entry.name)
+                    if path in wanted:
+                        found.add(path)
+        except OSError:
+            continue
+    
+    return found
+
+
 def diff_commits(commit1: str, commit2: str) -> int:
     """Show diff between two commits"""
-    c1_path = os.path.join(COMMITS_DIR, commit1)
-    c2_path = os.path.join(COMMITS_DIR, commit2)
+    c1_path = commit_dir(commit1)
+    c2_path = commit_dir(commit2)
     
-    if not os.path.exists(c1_path):
+    if not commit_exists(commit1):
         print(f"Error: Commit '{commit1}' does not exist")
         return 1
     
-    if not os.path.exists(c2_path):
+    if not commit_exists(commit2):
         print(f"Error: Commit '{commit2}' does not exist")
         return 1
     
     # Get file lists
-    c1_meta = read_json(os.path.join(c1_path, "meta.json"), {})
-    c2_meta = read_json(os.path.join(c2_path, "meta.json"), {})
+    c1_meta = load_commit_meta(commit1)
+    c2_meta = load_commit_meta(commit2)
     
     c1_files = set(c1_meta.get("files", []))
     c2_files = set(c2_meta.get("files", []))
     
     all_files = c1_files | c2_files
+    c1_stored = commit_file_paths(c1_path, c1_meta)
+    c2_stored = commit_file_paths(c2_path, c2_meta)
+    c1_compressed = commit_is_compressed(c1_meta)
+    c2_compressed = commit_is_compressed(c2_meta)
     
     if not all_files:
         print("No files to compare")
         return 0
     
-    print(f"{Colors.BOLD}Comparing {commit1[:8]} → {commit2[:8]}{Colors.RESET}\n")
+    # Build the whole report and write it out at once
+    out = [f"{Colors.BOLD}Comparing {commit1[:8]} → {commit2[:8]}{Colors.RESET}\n"]
     
     total_added = 0
     total_removed = 0
     files_changed = 0
     
     for file in sorted(all_files):
-        c1_file = os.path.join(c1_path, file)
-        c2_file = os.path.join(c2_path, file)
+        c1_file = c1_stored.get(file)
+        c2_file = c2_stored.get(file)
         
         # Handle file additions/deletions
-        if not os.path.exists(c1_file):
-            print(f"{Colors.GREEN}+++ New file: {file}{Colors.RESET}")
-            if os.path.exists(c2_file):
-                with open(c2_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = len(f.readlines())
-                    print(f"    {Colors.GREEN}+{lines} lines{Colors.RESET}\n")
-                    total_added += lines
+        if not c1_file:
+            out.append(f"{Colors.GREEN}+++ New file: {file}{Colors.RESET}")
+            if c2_file:
+                lines = _count_lines(c2_file, c2_compressed)
+                out.append(f"    {Colors.GREEN}+{lines} lines{Colors.RESET}\n")
+                total_added += lines
             files_changed += 1
             continue
         
-        if not os.path.exists(c2_file):
-            print(f"{Colors.RED}--- Deleted file: {file}{Colors.RESET}")
-            with open(c1_file, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = len(f.readlines())
-                print(f"    {Colors.RED}-{lines} lines{Colors.RESET}\n")
-                total_removed += lines
+        if not c2_file:
+            out.append(f"{Colors.RED}--- Deleted file: {file}{Colors.RESET}")
+            lines = _count_lines(c1_file, c1_compressed)
+            out.append(f"    {Colors.RED}-{lines} lines{Colors.RESET}\n")
+            total_removed += lines
             files_changed += 1
             continue
         
+        # The same blob, or identical bytes, needs no decoding or diffing
+        if c1_file == c2_file or _same_content(c1_file, c2_file, c1_compressed, c2_compressed):
+            continue
+        
         # Compare file contents
         try:
-            with open(c1_file, 'r', encoding='utf-8') as f:
-                old_content = f.read()
-            with open(c2_file, 'r', encoding='utf-8') as f:
-                new_content = f.read()
+            old_content = _read_text(c1_file, c1_compressed)
+            new_content = _read_text(c2_file, c2_compressed)
             
             if old_content != new_content:
-                print(f"{Colors.BOLD}diff --wannabegit a/{file} b/{file}{Colors.RESET}")
-                diff = generate_diff(old_content, new_content, file)
+                out.append(f"{Colors.BOLD}diff --wannabegit a/{file} b/{file}{Colors.RESET}")
+                diff, added, removed = generate_diff(
+                    old_content, new_content, file, with_stats=True
+                )
                 
                 if diff:
-                    print(diff)
-                    added, removed, _ = get_diff_stats(old_content, new_content)
+                    out.append(diff)
                     total_added += added
                     total_removed += removed
                     files_changed += 1
                 else:
-                    print("  (Binary files differ)")
+                    out.append("  (Binary files differ)")
                     files_changed += 1
                 
-                print()
+                out.append("")
         
         except UnicodeDecodeError:
-            print(f"{Colors.YELLOW}Binary files {file} differ{Colors.RESET}\n")
+            out.append(f"{Colors.YELLOW}Binary files {file} differ{Colors.RESET}\n")
             files_changed += 1
     
     # Summary
     if files_changed > 0:
-        print(f"{Colors.BOLD}Summary:{Colors.RESET}")
-        print(f"  {files_changed} file(s) changed")
-        print(f"  {Colors.GREEN}+{total_added}{Colors.RESET} insertions")
-        print(f"  {Colors.RED}-{total_removed}{Colors.RESET} deletions")
+        out.append(f"{Colors.BOLD}Summary:{Colors.RESET}")
+        out.append(f"  {files_changed} file(s) changed")
+        out.append(f"  {Colors.GREEN}+{total_added}{Colors.RESET} insertions")
+        out.append(f"  {Colors.RED}-{total_removed}{Colors.RESET} deletions")
     else:
-        print("No differences found")
+        out.append("No differences found")
+    
+    sys.stdout.write("\n".join(out) + "\n")
     
     return 0
 
 
 def diff_commit_working(commit_id: str) -> int:
     """Show diff between commit and working directory"""
-    commit_path = os.path.join(COMMITS_DIR, commit_id)
+    commit_path = commit_dir(commit_id)
     
-    if not os.path.exists(commit_path):
+    if not commit_exists(commit_id):
         print(f"Error: Commit '{commit_id}' does not exist")
         return 1
     
-    meta = read_json(os.path.join(commit_path, "meta.json"), {})
+    meta = load_commit_meta(commit_id)
     tracked_files = meta.get("files", [])
+    stored = commit_file_paths(commit_path, meta)
+    compressed = commit_is_compressed(meta)
     
     if not tracked_files:
         print("No tracked files")
@@ -162,27 +254,39 @@ def diff_commit_working(commit_id: str) -> int:
     print(f"{Colors.BOLD}Changes in working directory since {commit_id[:8]}{Colors.RESET}\n")
     
     has_changes = False
+    existing = _existing_files(tracked_files)
+    
+    # Staged entries are newer than the stat info recorded at commit time
+    index = Repository.instance().load_index()
+    records = {**index.get("file_stats", {}), **index.get("staged_files", {})}
+    tree = meta.get("tree", {})
     
     for file in sorted(tracked_files):
-        committed_file = os.path.join(commit_path, file)
+        committed_file = stored.get(file)
         working_file = file
         
-        if not os.path.exists(working_file):
+        if committed_file is None:
+            continue
+        
+        if working_file not in existing:
             print(f"{Colors.RED}--- Deleted: {file}{Colors.RESET}\n")
             has_changes = True
             continue
         
+        # Identical content needs no decoding or diffing
+        if (_matches_record(working_file, records.get(file), tree.get(file))
+                or _same_content(committed_file, working_file, compressed)):
+            continue
+        
         try:
-            with open(committed_file, 'r', encoding='utf-8') as f:
-                old_content = f.read()
-            with open(working_file, 'r', encoding='utf-8') as f:
+            old_content = _read_text(committed_file, compressed)
+            with open(working_file, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as f:
                 new_content = f.read()
             
             if old_content != new_content:
                 print(f"{Colors.BOLD}diff --wannabegit a/{file} b/{file}{Colors.RESET}")
-                diff = generate_diff(old_content, new_content, file)
-                print(diff)
-                print()
+                sys.stdout.writelines(iter_diff_lines(old_content, new_content, file))
+                sys.stdout.write("\n\n")
                 has_changes = True
         
         except UnicodeDecodeError:
@@ -201,39 +305,46 @@ def diff_cached(head_commit: str) -> int:
         print("No HEAD commit. Showing all staged files:")
         return show_staged_files()
     
-    index = read_json(INDEX_FILE, {"staged_files": {}})
+    index = Repository.instance().load_index()
     staged = index.get("staged_files", {})
     
     if not staged:
         print("No staged changes")
         return 0
     
-    commit_path = os.path.join(COMMITS_DIR, head_commit)
+    commit_path = commit_dir(head_commit)
+    meta = load_commit_meta(head_commit)
+    stored = commit_file_paths(commit_path, meta)
+    compressed = commit_is_compressed(meta)
+    existing = _existing_files(staged)
     print(f"{Colors.BOLD}Staged changes (to be committed){Colors.RESET}\n")
     
     for file in sorted(staged.keys()):
-        committed_file = os.path.join(commit_path, file)
+        committed_file = stored.get(file)
         working_file = file
         
-        if not os.path.exists(committed_file):
+        if not committed_file:
             print(f"{Colors.GREEN}+++ New file: {file}{Colors.RESET}\n")
             continue
         
-        if not os.path.exists(working_file):
+        if working_file not in existing:
             print(f"{Colors.RED}--- Deleted: {file}{Colors.RESET}\n")
             continue
         
+        # Identical content needs no decoding or diffing
+        if (_matches_record(working_file, staged[file], meta.get("tree", {}).get(file))
+                or _same_content(committed_file, working_file, compressed)):
+            continue
+        
         try:
-            with open(committed_file, 'r', encoding='utf-8') as f:
-                old_content = f.read()
-            with open(working_file, 'r', encoding='utf-8') as f:
+            old_content = _read_text(committed_file, compressed)
+            with open(working_file, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as f:
                 new_content = f.read()
             
             if old_content != new_content:
                 print(f"{Colors.BOLD}diff --wannabegit a/{file} b/{file}{Colors.RESET}")
-                diff = generate_diff(old_content, new_content, file)
-                print(diff)
-                print()
+                sys.stdout.writelines(iter_diff_lines(old_content, new_content, file))
+                sys.stdout.write("\n\n")
         
         except UnicodeDecodeError:
             print(f"{Colors.YELLOW}Binary file {file} staged{Colors.RESET}\n")
@@ -243,7 +354,7 @@ def diff_cached(head_commit: str) -> int:
 
 def show_staged_files() -> int:
     """Show list of staged files"""
-    index = read_json(INDEX_FILE, {"staged_files": {}})
+    index = Repository.instance().load_index()
     staged = index.get("staged_files", {})
     
     for file in sorted(staged.keys()):
@@ -1,36 +1,45 @@
 """
 Visual commit graph display with branch visualization
 """
-import os
-from typing import Dict, List, Set, Tuple
-from wannabegit.core import Repository, COMMITS_DIR, read_json
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from wannabegit.core import Repository, load_commit_meta, list_commit_ids
 from wannabegit.diff_engine import Colors
 
 
-def build_commit_graph() -> Dict[str, dict]:
-    """Build a graph of all commits with their relationships"""
+def walk_commits(start_ids: Iterable[str]) -> Iterator[Tuple[str, dict]]:
+    """
+    Yield (commit_id, metadata) for the given commits and their ancestors
+    
+    Metadata is loaded on demand and each commit is yielded once, so only
+    history that is actually reached gets read.
+    """
+    seen = set()
+    
+    for current in start_ids:
+        while current and current not in seen:
+            seen.add(current)
+            meta = load_commit_meta(current)
+            if not meta:
+                break
+            
+            yield current, meta
+            current = meta.get("parent")
+
+
+def _link_graph(metas: Iterable[Tuple[str, dict]]) -> Dict[str, dict]:
+    """Build graph nodes from (commit_id, metadata) pairs"""
     graph = {}
     
-    if not os.path.exists(COMMITS_DIR):
-        return graph
-    
-    for commit_id in os.listdir(COMMITS_DIR):
-        commit_path = os.path.join(COMMITS_DIR, commit_id)
-        
-        if not os.path.isdir(commit_path):
-            continue
-        
-        meta = read_json(os.path.join(commit_path, "meta.json"), {})
-        
-        if meta:
-            graph[commit_id] = {
-                "parent": meta.get("parent"),
-                "message": meta.get("message", "No message"),
-                "timestamp": meta.get("timestamp", "Unknown"),
-                "author": meta.get("author", {}),
-                "branch": meta.get("branch", ""),
-                "children": []
-            }
+    for commit_id, meta in metas:
+        graph[commit_id] = {
+            "parent": meta.get("parent"),
+            "message": meta.get("message", "No message"),
+            "timestamp": meta.get("timestamp", "Unknown"),
+            "author": meta.get("author", {}),
+            "branch": meta.get("branch", ""),
+            "children": []
+        }
     
     # Build children relationships
     for commit_id, data in graph.items():
@@ -41,6 +50,21 @@ def build_commit_graph() -> Dict[str, dict]:
     return graph
 
 
+def build_commit_graph(start_ids: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+    """
+    Build a graph of commits with their relationships
+    
+    Args:
+        start_ids: Only include these commits and their ancestors; by
+            default every stored commit is read
+    """
+    if start_ids is not None:
+        return _link_graph(walk_commits(start_ids))
+    
+    metas = ((commit_id, load_commit_meta(commit_id)) for commit_id in list_commit_ids())
+    return _link_graph((commit_id, meta) for commit_id, meta in metas if meta)
+
+
 def get_commit_chain(commit_id: str, graph: Dict[str, dict]) -> List[str]:
     """Get chain of commits from commit to root"""
     chain = []
@@ -55,6 +79,23 @@ def get_commit_chain(commit_id: str, graph: Dict[str, dict]) -> List[str]:
     return chain
 
 
+def get_reachable(tips: Iterable[str], graph: Dict[str, dict]) -> Set[str]:
+    """
+    Get all commits reachable from any of the given tips
+    
+    The visited set is shared between tips, so history common to several
+    branches is walked only once.
+    """
+    reachable = set()
+    
+    for current in tips:
+        while current and current in graph and current not in reachable:
+            reachable.add(current)
+            current = graph[current]["parent"]
+    
+    return reachable
+
+
 def cmd_graph(limit: int = None) -> int:
     """
     Display visual commit graph
@@ -73,10 +114,9 @@ def cmd_graph(limit: int = None) -> int:
         print(f"Error: {e}")
         return 1
     
-    # Build commit graph
-    graph = build_commit_graph()
+    commit_ids = list_commit_ids()
     
-    if not graph:
+    if not commit_ids:
         print("No commits yet")
         return 0
     
@@ -89,13 +129,15 @@ def cmd_graph(limit: int = None) -> int:
     branch_heads = {}
     
     for branch in branches:
-        branch_file = repo.refs_dir / branch
-        if branch_file.exists():
-            commit = branch_file.read_text().strip()
-            if commit:
-                if commit not in branch_heads:
-                    branch_heads[commit] = []
-                branch_heads[commit].append(branch)
+        commit = repo.get_branch_commit(branch)
+        if commit:
+            if commit not in branch_heads:
+                branch_heads[commit] = []
+            branch_heads[commit].append(branch)
+    
+    # Only history reachable from HEAD or a branch is read; commits that
+    # nothing points to are counted from the directory listing alone
+    graph = build_commit_graph([head_commit, *branch_heads])
     
     # Build commit chain from HEAD
     if head_commit and head_commit in graph:
@@ -105,14 +147,19 @@ def cmd_graph(limit: int = None) -> int:
             commits = commits[:limit]
     else:
         # Show all commits sorted by timestamp
-        commits = sorted(graph.keys(), 
-                        key=lambda x: graph[x]["timestamp"], 
-                        reverse=True)
+        graph = build_commit_graph()
+        # Extract the keys once so the sort runs without Python callbacks
+        pairs = [(data["timestamp"], commit_id) for commit_id, data in graph.items()]
+        pairs.sort(reverse=True)
+        commits = [commit_id for _, commit_id in pairs]
         if limit:
             commits = commits[:limit]
     
+    # Build the whole graph and write it out at once
+    out = []
+    
     # Display graph
-    print(f"{Colors.BOLD}=== COMMIT GRAPH ==={Colors.RESET}\n")
+    out.append(f"{Colors.BOLD}=== COMMIT GRAPH ==={Colors.RESET}\n")
     
     for i, commit_id in enumerate(commits):
         data = graph[commit_id]
@@ -145,31 +192,29 @@ def cmd_graph(limit: int = None) -> int:
         timestamp = data["timestamp"]
         author = data["author"].get("name", "Unknown")
         
-        print(f"{Colors.YELLOW}{connector}{short_id}{Colors.RESET}{label_str}")
-        print(f"  {message}")
-        print(f"  {Colors.DIM}{author} • {timestamp}{Colors.RESET}")
+        out.append(f"{Colors.YELLOW}{connector}{short_id}{Colors.RESET}{label_str}")
+        out.append(f"  {message}")
+        out.append(f"  {Colors.DIM}{author} • {timestamp}{Colors.RESET}")
         
         # Show parent connection
         if i < len(commits) - 1:
-            print("  |")
+            out.append("  |")
     
     # Show statistics
-    print(f"\n{Colors.BOLD}Statistics:{Colors.RESET}")
-    print(f"  Total commits: {len(graph)}")
-    print(f"  Branches: {len(branches)}")
+    out.append(f"\n{Colors.BOLD}Statistics:{Colors.RESET}")
+    out.append(f"  Total commits: {len(commit_ids)}")
+    out.append(f"  Branches: {len(branches)}")
     
     # Show orphaned commits (not reachable from any branch)
-    reachable = set()
-    for branch in branches:
-        branch_file = repo.refs_dir / branch
-        if branch_file.exists():
-            commit = branch_file.read_text().strip()
-            if commit:
-                reachable.update(get_commit_chain(commit, graph))
+    reachable = get_reachable(
+        (repo.get_branch_commit(branch) for branch in branches), graph
+    )
     
-    orphaned = set(graph.keys()) - reachable
+    orphaned = set(commit_ids) - reachable
     if orphaned:
-        print(f"  {Colors.YELLOW}Orphaned commits: {len(orphaned)}{Colors.RESET}")
+        out.append(f"  {Colors.YELLOW}Orphaned commits: {len(orphaned)}{Colors.RESET}")
+    
+    sys.stdout.write("\n".join(out) + "\n")
     
     return 0
 
@@ -184,13 +229,12 @@ def cmd_graph_ascii(limit: int = None) -> int:
         print(f"Error: {e}")
         return 1
     
-    graph = build_commit_graph()
-    
-    if not graph:
+    if not list_commit_ids():
         print("No commits yet")
         return 0
     
     head_commit = repo.get_head()
+    graph = build_commit_graph([head_commit])
     
     if not head_commit or head_commit not in graph:
         print("No HEAD commit")
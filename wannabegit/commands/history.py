@@ -1,8 +1,8 @@
 """
 Enhanced history/log command with multiple display formats
 """
-import os
-from wannabegit.core import Repository, COMMITS_DIR, read_json
+import sys
+from wannabegit.core import Repository, commit_exists, load_commit_meta
 from wannabegit.diff_engine import Colors
 
 
@@ -40,15 +40,12 @@ def cmd_history(limit: int = None, oneline: bool = False) -> int:
     
     while current and current not in visited:
         visited.add(current)
-        meta_path = os.path.join(COMMITS_DIR, current, "meta.json")
-        
-        if not os.path.exists(meta_path):
+        # Missing commits load as {}, so no separate exists() check
+        metadata = load_commit_meta(current)
+        if not metadata:
             break
         
-        metadata = read_json(meta_path, {})
-        if metadata:
-            commits.append(metadata)
-        
+        commits.append(metadata)
         current = metadata.get("parent")
         
         # Apply limit
@@ -59,6 +56,9 @@ def cmd_history(limit: int = None, oneline: bool = False) -> int:
         print("No commits found")
         return 0
     
+    # Build the whole listing and write it out at once
+    out = []
+    
     # Display commits
     if oneline:
         # One-line format
@@ -69,9 +69,9 @@ def cmd_history(limit: int = None, oneline: bool = False) -> int:
             # Highlight HEAD
             if meta.get("id") == head_commit:
                 branch_info = f"({Colors.CYAN}{current_branch or 'HEAD'}{Colors.RESET})"
-                print(f"{Colors.YELLOW}{commit_id}{Colors.RESET} {branch_info} {message}")
+                out.append(f"{Colors.YELLOW}{commit_id}{Colors.RESET} {branch_info} {message}")
             else:
-                print(f"{Colors.YELLOW}{commit_id}{Colors.RESET} {message}")
+                out.append(f"{Colors.YELLOW}{commit_id}{Colors.RESET} {message}")
     
     else:
         # Full format
@@ -91,21 +91,23 @@ def cmd_history(limit: int = None, oneline: bool = False) -> int:
             else:
                 head_marker = ""
             
-            print(f"{Colors.YELLOW}commit {commit_id}{Colors.RESET}{head_marker}")
+            out.append(f"{Colors.YELLOW}commit {commit_id}{Colors.RESET}{head_marker}")
             
             if parent:
-                print(f"Parent: {parent[:8]}")
+                out.append(f"Parent: {parent[:8]}")
             
-            print(f"Author: {author_name} <{author_email}>")
-            print(f"Date:   {timestamp}")
-            print(f"\n    {message}")
+            out.append(f"Author: {author_name} <{author_email}>")
+            out.append(f"Date:   {timestamp}")
+            out.append(f"\n    {message}")
             
             if files:
-                print(f"\n    {len(files)} file(s) changed")
+                out.append(f"\n    {len(files)} file(s) changed")
             
             # Add separator between commits
             if i < len(commits) - 1:
-                print()
+                out.append("")
+    
+    sys.stdout.write("\n".join(out) + "\n")
     
     return 0
 
@@ -136,13 +138,11 @@ def cmd_show(commit_id: str = None) -> int:
             return 1
     
     # Load metadata
-    meta_path = os.path.join(COMMITS_DIR, commit_id, "meta.json")
-    
-    if not os.path.exists(meta_path):
+    if not commit_exists(commit_id):
         print(f"Commit '{commit_id}' not found")
         return 1
     
-    metadata = read_json(meta_path, {})
+    metadata = load_commit_meta(commit_id)
     
     # Display detailed info
     print(f"{Colors.YELLOW}commit {metadata.get('id')}{Colors.RESET}")
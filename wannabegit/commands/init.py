@@ -3,8 +3,8 @@ Repository initialization command with configuration setup
 """
 import os
 from wannabegit.core import (
-    VCS_DIR, COMMITS_DIR, INDEX_FILE, HEAD_FILE, CONFIG_FILE,
-    write_json, Repository
+    VCS_DIR, COMMITS_DIR, HEAD_FILE, CONFIG_FILE,
+    write_json, write_index, Repository
 )
 from wannabegit.ignore import create_default_ignore_file
 
@@ -31,7 +31,7 @@ def cmd_init() -> int:
         os.makedirs(os.path.join(VCS_DIR, "refs", "tags"), exist_ok=True)
         
         # Initialize index (staging area)
-        write_json(INDEX_FILE, {
+        write_index({
             "tracked_files": [],
             "staged_files": {},
             "version": "1.0"
@@ -51,7 +51,8 @@ def cmd_init() -> int:
             "core": {
                 "repositoryformatversion": 0,
                 "filemode": True,
-                "bare": False
+                "bare": False,
+                "compression": 0
             },
             "user": {
                 "name": os.environ.get("USER", "Unknown User"),
@@ -1,10 +1,10 @@
 """
 Enhanced revert command with hard/soft options and safety checks
 """
-import os
-import shutil
 from wannabegit.core import (
-    Repository, COMMITS_DIR, INDEX_FILE, read_json, write_json
+    Repository, commit_dir, commit_exists, find_commits_by_prefix, list_commit_ids,
+    make_parent_dirs, copy_file, commit_file_paths, commit_file_modes,
+    commit_is_compressed, load_commit_meta
 )
 from wannabegit.diff_engine import Colors
 
@@ -28,26 +28,28 @@ def cmd_revert(commit_id: str, hard: bool = False) -> int:
         print(f"Error: {e}")
         return 1
     
-    commit_path = os.path.join(COMMITS_DIR, commit_id)
-    
-    if not os.path.exists(commit_path):
+    if not commit_exists(commit_id):
         print(f"Error: Commit '{commit_id}' does not exist")
         
-        # Suggest similar commits
-        all_commits = [d for d in os.listdir(COMMITS_DIR) if os.path.isdir(os.path.join(COMMITS_DIR, d))]
-        similar = [c for c in all_commits if commit_id.lower() in c.lower()]
+        # Suggest similar commits: prefix matches come from one fanout
+        # directory; only without any is every commit ID searched
+        needle = commit_id.lower()
+        similar = find_commits_by_prefix(needle)
+        if not similar:
+            similar = [c for c in list_commit_ids() if needle in c.lower()]
         
         if similar:
             print("\nDid you mean:")
             for c in similar[:5]:
-                meta = read_json(os.path.join(COMMITS_DIR, c, "meta.json"), {})
+                meta = load_commit_meta(c)
                 msg = meta.get("message", "No message")
                 print(f"  {c[:8]}: {msg}")
         
         return 1
     
     # Load commit metadata
-    meta = read_json(os.path.join(commit_path, "meta.json"), {})
+    commit_path = commit_dir(commit_id)
+    meta = load_commit_meta(commit_id)
     files = meta.get("files", [])
     commit_msg = meta.get("message", "No message")
     
@@ -55,7 +57,7 @@ def cmd_revert(commit_id: str, hard: bool = False) -> int:
         print(f"Warning: Commit '{commit_id}' has no files")
     
     # Check for uncommitted changes
-    index = read_json(INDEX_FILE, {"tracked_files": [], "staged_files": {}})
+    index = repo.load_index()
     has_staged = len(index.get("staged_files", {})) > 0
     
     if has_staged and not hard:
@@ -71,19 +73,23 @@ def cmd_revert(commit_id: str, hard: bool = False) -> int:
     try:
         restored_count = 0
         error_count = 0
+        stored = commit_file_paths(commit_path, meta)
+        modes = commit_file_modes(meta, stored)
+        compressed = commit_is_compressed(meta)
         
+        present = []
         for file in files:
-            src = os.path.join(commit_path, file)
-            dst = file
-            
-            if not os.path.exists(src):
+            if file not in stored:
                 print(f"Warning: '{file}' not in commit, skipping")
                 continue
-            
+            present.append(file)
+        
+        # Create each parent directory once
+        make_parent_dirs(present)
+        
+        for file in present:
             try:
-                # Create parent directories
-                os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
-                shutil.copy2(src, dst)
+                copy_file(stored[file], file, modes.get(file), compressed)
                 restored_count += 1
             except IOError as e:
                 print(f"Error restoring '{file}': {e}")
@@ -99,8 +105,8 @@ def cmd_revert(commit_id: str, hard: bool = False) -> int:
             index["staged_files"] = {}
         
         # Update tracked files
-        index["tracked_files"] = files
-        write_json(INDEX_FILE, index)
+        index["tracked_files"] = list(files)
+        repo.save_index(index)
         
         # Report results
         print(f"\n{Colors.GREEN}Reverted to commit {commit_id[:8]}{Colors.RESET}")
@@ -146,7 +152,7 @@ def cmd_reset(mode: str = "mixed") -> int:
         print("No HEAD commit to reset")
         return 1
     
-    index = read_json(INDEX_FILE, {"tracked_files": [], "staged_files": {}})
+    index = repo.load_index()
     
     if mode == "soft":
         # Keep both staged and working changes, just move HEAD
@@ -156,27 +162,28 @@ def cmd_reset(mode: str = "mixed") -> int:
     elif mode == "mixed":
         # Keep working changes, clear staging area
         index["staged_files"] = {}
-        write_json(INDEX_FILE, index)
+        repo.save_index(index)
         print(f"Reset HEAD to {head_commit[:8]} (mixed)")
         print("Staging area cleared, working directory preserved")
     
     elif mode == "hard":
         # Discard all changes
-        commit_path = os.path.join(COMMITS_DIR, head_commit)
-        meta = read_json(os.path.join(commit_path, "meta.json"), {})
+        commit_path = commit_dir(head_commit)
+        meta = load_commit_meta(head_commit)
         files = meta.get("files", [])
         
         # Restore all files
-        for file in files:
-            src = os.path.join(commit_path, file)
-            if os.path.exists(src):
-                os.makedirs(os.path.dirname(file) or '.', exist_ok=True)
-                shutil.copy2(src, file)
+        stored = commit_file_paths(commit_path, meta)
+        modes = commit_file_modes(meta, stored)
+        compressed = commit_is_compressed(meta)
+        make_parent_dirs(stored)
+        for file, src in stored.items():
+            copy_file(src, file, modes.get(file), compressed)
         
         # Clear staging
         index["staged_files"] = {}
-        index["tracked_files"] = files
-        write_json(INDEX_FILE, index)
+        index["tracked_files"] = list(files)
+        repo.save_index(index)
         
         print(f"Reset HEAD to {head_commit[:8]} (hard)")
         print(f"{Colors.RED}All changes discarded{Colors.RESET}")
@@ -2,28 +2,48 @@
 Enhanced status command with detailed file state tracking
 """
 import os
-from typing import Dict, List, Set
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Set
 from wannabegit.core import (
-    Repository, INDEX_FILE, COMMITS_DIR, read_json, get_file_hash
+    Repository, commit_dir, get_file_hash, commit_file_paths,
+    load_commit_meta, get_recorded_hash, PARALLEL_THRESHOLD, MAX_IO_WORKERS
 )
 from wannabegit.ignore import IgnoreManager
 from wannabegit.diff_engine import Colors
 
 
 def get_file_status(file_path: str, staged_files: Dict, 
-                   head_commit_path: str = None) -> str:
+                   head_files: Dict[str, str] = None,
+                   head_tree: Dict[str, str] = None,
+                   file_stats: Dict = None) -> str:
     """
     Determine file status
     
+    Args:
+        file_path: File to check
+        staged_files: Staged entries from the index
+        head_files: Mapping of HEAD's files to their stored content
+        head_tree: Mapping of HEAD's files to their content hashes, so the
+            committed copy does not have to be hashed again
+        file_stats: Stat info recorded at commit time, so files unchanged
+            since staging or committing do not have to be hashed either
+    
     Returns:
         'staged', 'modified', 'untracked', 'deleted', 'unchanged'
     """
-    if not os.path.exists(file_path):
+    # One stat serves both the existence check and the index comparison
+    try:
+        st = os.stat(file_path)
+    except OSError:
         if file_path in staged_files:
             return 'staged_deleted'
         return 'deleted'
     
-    current_hash = get_file_hash(file_path)
+    # Index entries whose stat info still matches already hold the hash
+    record = staged_files.get(file_path) or (file_stats or {}).get(file_path)
+    current_hash = get_recorded_hash(file_path, record, st)
+    if current_hash is None:
+        current_hash = get_file_hash(file_path)
     
     # Check staging area
     if file_path in staged_files:
@@ -33,12 +53,17 @@ def get_file_status(file_path: str, staged_files: Dict,
         return 'staged'
     
     # Check against HEAD if it exists
-    if head_commit_path and os.path.exists(head_commit_path):
-        rel_path = os.path.relpath(file_path)
-        committed_file = os.path.join(head_commit_path, rel_path)
+    if head_files:
+        # Tracked paths are stored normalized and relative already
+        rel_path = os.path.relpath(file_path) if os.path.isabs(file_path) else file_path
+        committed_hash = head_tree.get(rel_path) if head_tree else None
+        
+        if committed_hash is None:
+            committed_file = head_files.get(rel_path)
+            if committed_file and os.path.exists(committed_file):
+                committed_hash = get_file_hash(committed_file)
         
-        if os.path.exists(committed_file):
-            committed_hash = get_file_hash(committed_file)
+        if committed_hash is not None:
             if current_hash != committed_hash:
                 return 'modified'
             return 'unchanged'
@@ -46,6 +71,42 @@ def get_file_status(file_path: str, staged_files: Dict,
     return 'untracked'
 
 
+def _walk_files(ignore_manager: IgnoreManager) -> Iterator[str]:
+    """
+    Yield every non-ignored file below the working directory
+    
+    Walks with os.scandir, whose entries already know from the directory
+    listing whether they are directories, so neither the walk nor the
+    ignore checks stat the entries. Files come out in the same order as
+    a top-down os.walk.
+    """
+    stack = [""]
+    while stack:
+        directory = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory or os.curdir) as entries:
+                for entry in entries:
+                    path = directory + entry.name
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    
+                    if ignore_manager.is_ignored(path, is_dir=is_dir):
+                        continue
+                    
+                    if is_dir:
+                        if not entry.is_symlink():
+                            subdirs.append(path + os.sep)
+                    else:
+                        yield path
+        except OSError:
+            continue
+        
+        stack.extend(reversed(subdirs))
+
+
 def cmd_status(short: bool = False) -> int:
     """
     Display working tree status
@@ -65,18 +126,22 @@ def cmd_status(short: bool = False) -> int:
         return 1
     
     # Load index
-    index = read_json(INDEX_FILE, {
-        "tracked_files": [],
-        "staged_files": {}
-    })
+    index = repo.load_index()
     
     tracked_files = set(index.get("tracked_files", []))
     staged_files = index.get("staged_files", {})
+    file_stats = index.get("file_stats", {})
     
     # Get current branch and HEAD
     current_branch = repo.get_current_branch()
     head_commit = repo.get_head()
-    head_path = os.path.join(COMMITS_DIR, head_commit) if head_commit else None
+    head_files = None
+    head_tree = None
+    if head_commit:
+        head_path = commit_dir(head_commit)
+        head_meta = load_commit_meta(head_commit)
+        head_files = commit_file_paths(head_path, head_meta)
+        head_tree = head_meta.get("tree")
     
     # Categorize files
     staged_changes: List[str] = []
@@ -86,10 +151,19 @@ def cmd_status(short: bool = False) -> int:
     
     ignore_manager = IgnoreManager()
     
-    # Check tracked files
-    for file in tracked_files:
-        status = get_file_status(file, staged_files, head_path)
-        
+    # Check tracked files; hashing releases the GIL, so larger sets are
+    # checked on a thread pool
+    def file_status(file: str) -> str:
+        return get_file_status(file, staged_files, head_files, head_tree, file_stats)
+    
+    paths = list(tracked_files)
+    if len(paths) < PARALLEL_THRESHOLD:
+        statuses = map(file_status, paths)
+    else:
+        with ThreadPoolExecutor(max_workers=min(MAX_IO_WORKERS, len(paths))) as executor:
+            statuses = list(executor.map(file_status, paths))
+    
+    for file, status in zip(paths, statuses):
         if status == 'staged':
             staged_changes.append(file)
         elif status == 'modified':
@@ -101,18 +175,9 @@ def cmd_status(short: bool = False) -> int:
             unstaged_changes.append(file)
     
     # Check for untracked files
-    for root, dirs, files in os.walk("."):
-        # Filter ignored directories
-        dirs[:] = [d for d in dirs if not ignore_manager.is_ignored(os.path.join(root, d))]
-        
-        for file in files:
-            filepath = os.path.normpath(os.path.join(root, file))
-            
-            if ignore_manager.is_ignored(filepath):
-                continue
-            
-            if filepath not in tracked_files:
-                untracked_files.append(filepath)
+    for filepath in _walk_files(ignore_manager):
+        if filepath not in tracked_files:
+            untracked_files.append(filepath)
     
     # Display status
     if short:
@@ -2,22 +2,58 @@
 Core repository management utilities with improved architecture
 """
 import os
+import errno
+import gzip
 import json
 import hashlib
+import marshal
+import mmap
+import shutil
+import stat
+import sys
+import time
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set, Tuple, Any
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib json module
+    orjson = None
+
 # Repository structure
 VCS_DIR = ".wannabegit"
 OBJECTS_DIR = os.path.join(VCS_DIR, "objects")
 COMMITS_DIR = os.path.join(VCS_DIR, "commits")
 INDEX_FILE = os.path.join(VCS_DIR, "index.json")
+INDEX_CACHE_FILE = os.path.join(VCS_DIR, "index.cache")
 HEAD_FILE = os.path.join(VCS_DIR, "HEAD")
 REFS_DIR = os.path.join(VCS_DIR, "refs", "heads")
 CONFIG_FILE = os.path.join(VCS_DIR, "config.json")
 
+# Files at least this large are hashed through mmap instead of read()
+MMAP_HASH_THRESHOLD = 64 * 1024
+
+# Batches smaller than this are processed serially to avoid pool startup cost
+PARALLEL_THRESHOLD = 8
+MAX_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Suffix of gzip-compressed blobs, written when core.compression is set
+COMPRESSED_SUFFIX = ".z"
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+# Marks a cached value that has not been loaded yet
+_UNSET = object()
+
+# mtime of index.json as last read or written by this process. Stat records
+# of files modified at or after it are "racily clean": the file may have
+# changed again within the same timestamp tick, so they are not trusted.
+_index_mtime_ns: Optional[int] = None
+
 
 class RepositoryError(Exception):
     """Base exception for repository errors"""
@@ -27,6 +63,9 @@ class RepositoryError(Exception):
 class Repository:
     """Main repository class for managing VCS operations"""
     
+    # Shared instance handed out by instance()
+    _instance: Optional["Repository"] = None
+    
     def __init__(self, path: str = "."):
         self.root = Path(path).resolve()
         self.vcs_dir = self.root / VCS_DIR
@@ -34,9 +73,37 @@ class Repository:
         self.commits_dir = self.vcs_dir / "commits"
         self.refs_dir = self.vcs_dir / "refs" / "heads"
         
+        # HEAD and branch references are read lazily and cached; all
+        # writes go through this class so the caches stay current
+        self._head: Any = _UNSET
+        self._refs: Dict[str, Optional[str]] = {}
+        self._branch_names: Optional[List[str]] = None
+        
+        # The index is parsed once per instance and replaced on save
+        self._index: Optional[Dict[str, Any]] = None
+        
+    @classmethod
+    def instance(cls) -> "Repository":
+        """
+        Get the shared repository for the current directory
+        
+        The repository is located and checked once per process; later
+        calls from the same directory reuse it.
+        
+        Raises:
+            RepositoryError: If no repository is initialized here
+        """
+        root = Path(".").resolve()
+        if cls._instance is None or cls._instance.root != root:
+            repo = cls()
+            repo.ensure_exists()
+            cls._instance = repo
+        return cls._instance
+    
     def exists(self) -> bool:
         """Check if repository is initialized"""
-        return self.vcs_dir.exists() and self.vcs_dir.is_dir()
+        # is_dir() is False for missing paths too, so one stat is enough
+        return self.vcs_dir.is_dir()
     
     def ensure_exists(self):
         """Ensure repository exists, raise error if not"""
@@ -45,18 +112,36 @@ class Repository:
                 "Not a wannabegit repository. Run 'wannabegit init' first."
             )
     
+    def _read_head(self) -> Optional[str]:
+        """Read the raw HEAD content, once per instance (None if missing)"""
+        if self._head is _UNSET:
+            try:
+                self._head = (self.vcs_dir / "HEAD").read_text().strip()
+            except OSError:
+                self._head = None
+        return self._head
+    
+    def _read_ref(self, branch: str) -> Optional[str]:
+        """Read a branch reference, once per instance (None if missing)"""
+        if branch not in self._refs:
+            try:
+                self._refs[branch] = (self.refs_dir / branch).read_text().strip()
+            except OSError:
+                self._refs[branch] = None
+        return self._refs[branch]
+    
     def get_head(self) -> Optional[str]:
         """Get current HEAD commit ID or branch reference"""
-        head_file = self.vcs_dir / "HEAD"
-        if not head_file.exists():
+        content = self._read_head()
+        if content is None:
             return None
         
-        content = head_file.read_text().strip()
-        
         # Check if HEAD is detached (direct commit) or symbolic (branch)
         if content.startswith("ref: "):
             # Symbolic reference to branch
             ref_path = content[5:]  # Remove "ref: " prefix
+            if ref_path.startswith("refs/heads/"):
+                return self._read_ref(ref_path[11:])
             ref_file = self.vcs_dir / ref_path
             if ref_file.exists():
                 return ref_file.read_text().strip()
@@ -69,36 +154,75 @@ class Repository:
         head_file = self.vcs_dir / "HEAD"
         
         if branch:
-            # Symbolic reference
-            head_file.write_text(f"ref: refs/heads/{branch}\n")
+            # Symbolic reference; committing on the checked-out branch only
+            # moves the branch, so HEAD is not rewritten with the same ref
+            ref = f"ref: refs/heads/{branch}"
+            if self._read_head() != ref:
+                head_file.write_text(f"{ref}\n")
+                self._head = ref
             # Update branch reference
-            branch_file = self.refs_dir / branch
-            branch_file.write_text(f"{commit_id}\n")
+            self.set_branch(branch, commit_id)
         else:
             # Detached HEAD
             head_file.write_text(f"{commit_id}\n")
+            self._head = commit_id
     
     def get_current_branch(self) -> Optional[str]:
         """Get name of current branch"""
-        head_file = self.vcs_dir / "HEAD"
-        if not head_file.exists():
-            return None
-        
-        content = head_file.read_text().strip()
-        if content.startswith("ref: refs/heads/"):
+        content = self._read_head()
+        if content and content.startswith("ref: refs/heads/"):
             return content[16:]  # Remove "ref: refs/heads/"
         
         return None  # Detached HEAD
     
     def list_branches(self) -> List[str]:
         """List all branches"""
-        if not self.refs_dir.exists():
-            return []
-        return [f.name for f in self.refs_dir.iterdir() if f.is_file()]
+        if self._branch_names is None:
+            try:
+                with os.scandir(self.refs_dir) as entries:
+                    self._branch_names = [entry.name for entry in entries if entry.is_file()]
+            except OSError:
+                self._branch_names = []
+        return list(self._branch_names)
     
     def branch_exists(self, name: str) -> bool:
         """Check if branch exists"""
-        return (self.refs_dir / name).exists()
+        if self._branch_names is not None:
+            return name in self._branch_names
+        return self._read_ref(name) is not None
+    
+    def get_branch_commit(self, name: str) -> Optional[str]:
+        """Get the commit ID a branch points to (None if missing)"""
+        return self._read_ref(name)
+    
+    def set_branch(self, name: str, commit_id: str):
+        """Create or move a branch reference"""
+        (self.refs_dir / name).write_text(f"{commit_id}\n")
+        self._refs[name] = commit_id
+        if self._branch_names is not None and name not in self._branch_names:
+            self._branch_names.append(name)
+    
+    def delete_branch(self, name: str):
+        """Delete a branch reference"""
+        (self.refs_dir / name).unlink()
+        self._refs[name] = None
+        if self._branch_names is not None and name in self._branch_names:
+            self._branch_names.remove(name)
+    
+    def rename_branch(self, old_name: str, new_name: str):
+        """Rename a branch reference, updating HEAD if it points to it"""
+        (self.refs_dir / old_name).rename(self.refs_dir / new_name)
+        if old_name in self._refs:
+            self._refs[new_name] = self._refs[old_name]
+        self._refs[old_name] = None
+        if self._branch_names is not None:
+            self._branch_names = [
+                new_name if b == old_name else b for b in self._branch_names
+            ]
+        
+        if self.get_current_branch() == old_name:
+            (self.vcs_dir / "HEAD").write_text(f"ref: refs/heads/{new_name}\n")
+            self._head = f"ref: refs/heads/{new_name}"
     
     def get_config(self) -> Dict[str, Any]:
         """Load repository configuration"""
@@ -116,6 +240,25 @@ class Repository:
         """Save repository configuration"""
         config_path = self.vcs_dir / "config.json"
         config_path.write_text(json.dumps(config, indent=2))
+    
+    def load_index(self) -> Dict[str, Any]:
+        """
+        Load the index (staging area), reading it once per instance
+        
+        The returned dict is shared by later calls; commands that change
+        it must write it back with save_index().
+        """
+        if self._index is None:
+            index = read_index({"tracked_files": [], "staged_files": {}, "version": "1.0"})
+            index.setdefault("tracked_files", [])
+            index.setdefault("staged_files", {})
+            self._index = index
+        return self._index
+    
+    def save_index(self, index: Dict[str, Any]):
+        """Write the index and keep it as this instance's current index"""
+        write_index(index)
+        self._index = index
 
 
 def ensure_vcs_exists():
@@ -125,29 +268,150 @@ def ensure_vcs_exists():
 
 
 def read_json(path: str, default: Any) -> Any:
-    """Read JSON file with default fallback"""
-    if not os.path.exists(path):
-        return default
+    """
+    Read JSON file with default fallback (uses orjson when installed)
+    
+    The file is opened directly rather than checked with exists() first,
+    and read as bytes so both parsers skip a separate text decoding step.
+    """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
+        with open(path, "rb") as f:
+            content = f.read()
+        if orjson is not None:
+            return orjson.loads(content)
+        return json.loads(content)
+    except FileNotFoundError:
+        return default
+    except (ValueError, IOError) as e:
         print(f"Warning: Could not read {path}: {e}")
         return default
 
 
 def write_json(path: str, data: Any):
-    """Write JSON file with proper formatting"""
+    """
+    Write JSON file with proper formatting
+    
+    The data is serialized up front and written with a single write() to
+    a temporary sibling file, which is flushed to disk and then replaces
+    the target, so readers never observe a partially written file.
+    """
+    if orjson is not None:
+        content = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    else:
+        content = (json.dumps(data, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+    
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-        f.write("\n")  # Add trailing newline
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_index(default: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Read the index, from its binary cache when that is still current
+    
+    index.json stays the canonical format. Next to it, index.cache holds
+    the same data in marshal format together with the stat info of the
+    index.json it was made from, so as long as index.json is unchanged
+    the index is loaded without parsing JSON.
+    
+    Args:
+        default: Index to return when there is none
+    """
+    global _index_mtime_ns
+    try:
+        st = os.stat(INDEX_FILE)
+    except OSError:
+        return default
+    
+    _index_mtime_ns = st.st_mtime_ns
+    key = (sys.version_info[:2], st.st_size, st.st_mtime_ns, st.st_ino)
+    try:
+        with open(INDEX_CACHE_FILE, "rb") as f:
+            cached_key, index = marshal.load(f)
+        if cached_key == key:
+            return index
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    
+    index = read_json(INDEX_FILE, default)
+    _write_index_cache(index, key)
+    return index
+
+
+def write_index(index: Dict[str, Any]):
+    """Write the index to index.json and refresh its binary cache"""
+    # Stat records of files that are no longer tracked would otherwise
+    # pile up with every commit
+    file_stats = index.get("file_stats")
+    if file_stats:
+        tracked = set(index.get("tracked_files", []))
+        for path in [path for path in file_stats if path not in tracked]:
+            del file_stats[path]
+    
+    write_json(INDEX_FILE, index)
+    st = os.stat(INDEX_FILE)
+    
+    # Like git, drop the stat info of records that are racily clean with
+    # respect to the index just written, so they are never trusted later
+    if _smudge_racy_records(index, st.st_mtime_ns):
+        write_json(INDEX_FILE, index)
+        st = os.stat(INDEX_FILE)
+    
+    global _index_mtime_ns
+    _index_mtime_ns = st.st_mtime_ns
+    _write_index_cache(index, (sys.version_info[:2], st.st_size, st.st_mtime_ns, st.st_ino))
+
+
+def _smudge_racy_records(index: Dict[str, Any], index_mtime_ns: int) -> int:
+    """
+    Remove mtime_ns from records of files modified no earlier than the index
+    
+    Such a file may have been changed after it was hashed without its
+    mtime moving, so its record has to be hashed again when next checked.
+    
+    Returns:
+        Number of records smudged
+    """
+    smudged = 0
+    for records in (index.get("staged_files", {}), index.get("file_stats", {})):
+        for record in records.values():
+            if record.get("mtime_ns", -1) >= index_mtime_ns:
+                del record["mtime_ns"]
+                smudged += 1
+    return smudged
+
+
+def _write_index_cache(index: Dict[str, Any], key: Tuple) -> None:
+    """Store the index with the stat key of the index.json it matches"""
+    tmp_path = f"{INDEX_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            marshal.dump((key, index), f)
+        os.replace(tmp_path, INDEX_CACHE_FILE)
+    except (OSError, ValueError):
+        # The cache is only an optimization; index.json is still read
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
 
 def generate_commit_id(message: str, timestamp: str, parent: Optional[str] = None) -> str:
-    """Generate unique commit ID using SHA-1 hash"""
+    """
+    Generate unique commit ID using SHA-1 hash
+    
+    The timestamp only has second resolution, so the current time in
+    nanoseconds is hashed in as well to keep commits made within the same
+    second apart.
+    """
     content = f"{message}|{timestamp}|{parent or 'root'}"
-    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:8]
+    h = hashlib.sha1(content.encode("utf-8"))
+    h.update(time.time_ns().to_bytes(8, "little"))
+    return h.hexdigest()[:8]
 
 
 def hash_file_content(content: bytes) -> str:
@@ -166,14 +430,493 @@ def decompress_content(content: bytes) -> bytes:
 
 
 def get_file_hash(file_path: str) -> str:
-    """Get hash of file content"""
+    """
+    Get hash of file content
+    
+    Large files are mapped into memory and handed to hashlib as a single
+    buffer, so hashing runs entirely in C without copying the file into
+    a Python bytes object first. Files that cannot be mapped (some
+    network and FUSE filesystems) are streamed through hashlib instead.
+    """
     try:
         with open(file_path, "rb") as f:
-            return hash_file_content(f.read())
-    except IOError:
+            size = os.fstat(f.fileno()).st_size
+            if size < MMAP_HASH_THRESHOLD:
+                return hash_file_content(f.read())
+            
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return hash_file_content(mm)
+            except (OSError, ValueError):
+                f.seek(0)
+                return _stream_hash(f)
+    except (IOError, ValueError):
         return ""
 
 
+def _stream_hash(f) -> str:
+    """Hash an open binary file by streaming it, for files mmap rejects"""
+    if hasattr(hashlib, "file_digest"):  # Python 3.11+, reuses one buffer
+        return hashlib.file_digest(f, "sha1").hexdigest()
+    
+    # Read into one reused buffer instead of allocating a chunk per read
+    h = hashlib.sha1()
+    view = memoryview(bytearray(1024 * 1024))
+    while True:
+        n = f.readinto(view)
+        if not n:
+            break
+        h.update(view[:n])
+    return h.hexdigest()
+
+
+def stat_info(st: os.stat_result) -> Dict[str, int]:
+    """Extract the stat fields recorded in the index to detect changes"""
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "ino": st.st_ino
+    }
+
+
+def stat_matches(record: Dict[str, Any], st: os.stat_result) -> bool:
+    """
+    Check whether a recorded stat_info still describes a file
+    
+    Records of files modified no earlier than the index was last read or
+    written are racily clean and never match, since the file may have
+    changed within the same timestamp tick after it was hashed.
+    """
+    mtime_ns = record.get("mtime_ns")
+    return (
+        mtime_ns == st.st_mtime_ns
+        and record.get("size") == st.st_size
+        and record.get("ino") == st.st_ino
+        and _index_mtime_ns is not None
+        and mtime_ns < _index_mtime_ns
+    )
+
+
+def get_recorded_hash(file_path: str, record: Optional[Dict[str, Any]],
+                      st: Optional[os.stat_result] = None) -> Optional[str]:
+    """
+    Get a file's hash from an index record, if the record is still valid
+    
+    The index entries written by add and commit carry the file's hash
+    together with its stat_info, so they act as a persistent hash cache:
+    while size, mtime and inode are unchanged the file is not read again,
+    unless the record is racily clean (see stat_matches).
+    
+    Args:
+        file_path: File the record describes
+        record: Index entry with "hash" and stat_info fields, or None
+        st: Stat result of the file, if already known
+    
+    Returns:
+        The recorded hash, or None if the file must be hashed
+    """
+    if not record or not record.get("hash") or "mtime_ns" not in record:
+        return None
+    
+    if st is None:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+    
+    return record["hash"] if stat_matches(record, st) else None
+
+
+def hash_files(file_paths: List[str]) -> Dict[str, str]:
+    """
+    Hash several files, concurrently when there are enough of them
+    
+    File reads and hashlib both release the GIL, so a thread pool gives
+    real parallelism here.
+    
+    Returns:
+        Mapping of file path to hash, in the order given
+        (empty string for files that could not be read)
+    """
+    if len(file_paths) < PARALLEL_THRESHOLD:
+        return {path: get_file_hash(path) for path in file_paths}
+    
+    workers = min(MAX_IO_WORKERS, len(file_paths))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(file_paths, executor.map(get_file_hash, file_paths)))
+
+
+def make_parent_dirs(file_paths: Iterable[str]):
+    """Create the parent directories of several files, each only once"""
+    parents = {os.path.dirname(path) for path in file_paths}
+    parents.discard("")
+    
+    for parent in sorted(parents, key=lambda d: d.count(os.sep)):
+        os.makedirs(parent, exist_ok=True)
+
+
+# copy_file_range errors meaning "not possible here" rather than a real failure
+_COPY_RANGE_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}
+
+
+def copy_file_content(src: str, dst: str):
+    """
+    Copy a file's bytes, without any metadata
+    
+    os.copy_file_range lets copy-on-write filesystems (Btrfs, XFS) share
+    extents instead of copying data. Where it is unavailable or refused,
+    shutil.copyfile falls back to sendfile or a buffered copy.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if not copied:
+                        break
+                    remaining -= copied
+            return
+        except OSError as e:
+            if e.errno not in _COPY_RANGE_UNSUPPORTED:
+                raise
+    
+    shutil.copyfile(src, dst)
+
+
+def copy_file(src: str, dst: str, mode: Optional[int] = None, compressed: bool = False):
+    """
+    Copy file content and set the given permission bits
+    
+    Unlike shutil.copy2 this skips timestamps and extended attributes.
+    Compressed blobs are decompressed on the way. Blobs do not carry the
+    permissions of the files they were stored from, so the mode comes
+    from the commit (see commit_file_modes) rather than from src.
+    
+    Args:
+        src: Content path to copy from
+        dst: File to write
+        mode: Permission bits for dst, or None to leave them as they are
+        compressed: Whether src is a compressed blob (see commit_is_compressed)
+    """
+    if compressed:
+        with open_content(src, compressed) as fsrc, open(dst, "wb") as fdst:
+            shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+    else:
+        copy_file_content(src, dst)
+    
+    if mode is not None:
+        os.chmod(dst, mode)
+
+
+def copy_files(copies: List[Tuple[str, str, Optional[int]]],
+               compressed: bool = False) -> Dict[str, OSError]:
+    """
+    Copy several (src, dst, mode) files, concurrently when there are enough
+    
+    Parent directories of the destinations must already exist.
+    
+    Args:
+        copies: (content path, destination, permission bits or None) triples
+        compressed: Whether the content paths are compressed blobs
+    
+    Returns:
+        Mapping of destination path to the error for failed copies
+    """
+    def copy_one(copy: Tuple[str, str, Optional[int]]) -> Optional[OSError]:
+        try:
+            copy_file(*copy, compressed=compressed)
+        except OSError as e:
+            return e
+        return None
+    
+    if len(copies) < PARALLEL_THRESHOLD:
+        results = [copy_one(copy) for copy in copies]
+    else:
+        workers = min(MAX_IO_WORKERS, len(copies))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(copy_one, copies))
+    
+    return {dst: error for (_, dst, _), error in zip(copies, results) if error}
+
+
+def object_path(sha: str, compressed: bool = False) -> str:
+    """Get the path of a blob in the content-addressed object store"""
+    path = os.path.join(OBJECTS_DIR, sha[:2], sha[2:])
+    return path + COMPRESSED_SUFFIX if compressed else path
+
+
+def commit_is_compressed(meta: Dict[str, Any]) -> bool:
+    """
+    Check whether a commit's content paths are compressed blobs
+    
+    Taken from the commit rather than from the content path, since older
+    commits hold copies of user files that may have any name. Only commits
+    with a tree point into the object store.
+    """
+    return meta.get("tree") is not None and bool(meta.get("compressed"))
+
+
+def open_content(path: str, compressed: bool = False) -> BinaryIO:
+    """Open a content path for reading bytes, decompressing compressed blobs"""
+    if compressed:
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def store_object(src: str, sha: str, level: int = 0) -> bool:
+    """
+    Store a file's content as a blob, unless that blob already exists
+    
+    The blob is a copy rather than a hard link, since working files are
+    edited in place and would otherwise change the stored content. It is
+    written under a temporary name and moved into place.
+    
+    Args:
+        src: File to store
+        sha: Hash of the file's content
+        level: gzip compression level, or 0 to store the content as is
+    
+    Returns:
+        True if a new blob was written
+    """
+    dst = object_path(sha, compressed=bool(level))
+    if os.path.exists(dst):
+        return False
+    
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    _write_object(src, dst, level)
+    return True
+
+
+def _write_object(src: str, dst: str, level: int = 0):
+    """Copy src to the blob path dst via a temporary file, compressing if asked"""
+    tmp_path = f"{dst}.{os.getpid()}.tmp"
+    try:
+        if level:
+            # Streamed in chunks, so large files are never held in memory
+            with open(src, "rb") as fsrc, gzip.open(tmp_path, "wb", compresslevel=level) as fdst:
+                shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+        else:
+            copy_file_content(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@lru_cache(maxsize=4096)
+def commit_dir(commit_id: str) -> str:
+    """
+    Get the directory of a commit
+    
+    Commits are fanned out as commits/<id[:2]>/<id[2:]> so that no single
+    directory grows with the whole history. Commits written before that
+    live directly at commits/<id> and are still found there.
+    """
+    flat = os.path.join(COMMITS_DIR, commit_id)
+    if len(commit_id) <= 2 or os.path.exists(os.path.join(flat, "meta.json")):
+        return flat
+    return os.path.join(COMMITS_DIR, commit_id[:2], commit_id[2:])
+
+
+def commit_exists(commit_id: str) -> bool:
+    """Check whether a commit with this exact ID is stored"""
+    return bool(commit_id) and os.path.exists(os.path.join(commit_dir(commit_id), "meta.json"))
+
+
+def list_commit_ids() -> List[str]:
+    """List the IDs of all stored commits without reading their metadata"""
+    # Directory entries carry their type, so no per-commit stat is needed
+    commit_ids = []
+    try:
+        with os.scandir(COMMITS_DIR) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                if len(entry.name) != 2:
+                    # Commit stored before the fanout
+                    commit_ids.append(entry.name)
+                    continue
+                with os.scandir(entry.path) as fanned:
+                    commit_ids.extend(
+                        entry.name + sub.name for sub in fanned
+                        if sub.is_dir(follow_symlinks=False)
+                    )
+    except OSError:
+        return commit_ids
+    
+    return commit_ids
+
+
+def find_commits_by_prefix(prefix: str) -> List[str]:
+    """
+    List the IDs of stored commits starting with a prefix
+    
+    With at least two characters only the matching fanout directory is
+    listed (plus the top level, for commits stored before the fanout),
+    instead of every commit.
+    """
+    if len(prefix) < 2:
+        return [c for c in list_commit_ids() if c.startswith(prefix)]
+    
+    matches = []
+    try:
+        with os.scandir(os.path.join(COMMITS_DIR, prefix[:2])) as entries:
+            matches.extend(
+                prefix[:2] + entry.name for entry in entries
+                if entry.name.startswith(prefix[2:]) and entry.is_dir(follow_symlinks=False)
+            )
+    except OSError:
+        pass
+    
+    try:
+        with os.scandir(COMMITS_DIR) as entries:
+            matches.extend(
+                entry.name for entry in entries
+                if len(entry.name) != 2 and entry.name.startswith(prefix)
+                and entry.is_dir(follow_symlinks=False)
+            )
+    except OSError:
+        pass
+    
+    return matches
+
+
+@lru_cache(maxsize=4096)
+def load_commit_meta(commit_id: str) -> Dict[str, Any]:
+    """
+    Load a commit's meta.json, parsing each commit at most once per process
+    
+    Commits never change once written, so the cache needs no invalidation.
+    The returned dict is shared by every caller in the process and must
+    not be modified, nor any list or dict inside it; copy a value (such as
+    list(meta["files"])) before storing it somewhere that gets changed,
+    like the index.
+    
+    Returns:
+        Commit metadata, or an empty dict if the commit does not exist
+    """
+    return read_json(os.path.join(commit_dir(commit_id), "meta.json"), {})
+
+
+def store_objects(pairs: List[Tuple[str, str]], level: int = 0) -> int:
+    """
+    Store several (src, sha) files as blobs, concurrently when there are enough
+    
+    Files with the same content are stored once, and each object
+    directory is created once up front rather than once per blob.
+    
+    Args:
+        pairs: (file, hash of its content) pairs
+        level: gzip compression level, or 0 to store contents as is
+    
+    Returns:
+        Number of new blobs written
+    """
+    unique = {sha: src for src, sha in pairs}
+    missing = [
+        (src, dst) for src, dst in
+        ((src, object_path(sha, compressed=bool(level))) for sha, src in unique.items())
+        if not os.path.exists(dst)
+    ]
+    make_parent_dirs(dst for _, dst in missing)
+    
+    if len(missing) < PARALLEL_THRESHOLD:
+        for src, dst in missing:
+            _write_object(src, dst, level)
+    else:
+        workers = min(MAX_IO_WORKERS, len(missing))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda pair: _write_object(*pair, level), missing))
+    
+    return len(missing)
+
+
+def _scan_commit_files(commit_path: str, prefix: str = "") -> Set[str]:
+    """Collect relative paths of all files stored in a commit directory"""
+    found = set()
+    
+    with os.scandir(commit_path) as entries:
+        for entry in entries:
+            rel_path = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                found |= _scan_commit_files(entry.path, rel_path + os.sep)
+            else:
+                found.add(rel_path)
+    
+    return found
+
+
+def commit_file_paths(commit_path: str, meta: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Map each file of a commit to the path holding its content
+    
+    Commits with a tree point into the object store, at compressed blobs
+    if the commit was written with compression; older commits hold copies
+    of their files inside the commit directory. Files whose content is
+    missing from an older commit are left out. Read the content paths
+    with open_content() or copy_file(), passing commit_is_compressed(meta).
+    
+    Args:
+        commit_path: Commit directory
+        meta: Parsed meta.json of the commit
+    
+    Returns:
+        Mapping of file path (as listed in the commit) to content path
+    """
+    files = meta.get("files", [])
+    tree = meta.get("tree")
+    
+    if tree is not None:
+        compressed = commit_is_compressed(meta)
+        return {file: object_path(tree[file], compressed) for file in files if file in tree}
+    
+    # One directory scan instead of an exists() call per file
+    try:
+        present = _scan_commit_files(commit_path)
+    except OSError:
+        return {}
+    
+    commit_prefix = commit_path + os.sep
+    return {
+        file: commit_prefix + file
+        for file in files
+        if os.path.normpath(file) in present
+    }
+
+
+def commit_file_modes(meta: Dict[str, Any], stored: Dict[str, str]) -> Dict[str, int]:
+    """
+    Map each file of a commit to the permission bits it was committed with
+    
+    Commits with a tree record the modes in their metadata. Older commits
+    hold copies that kept their files' modes, so those are read from the
+    copies. Tree commits written before modes were recorded have none.
+    
+    Args:
+        meta: Parsed meta.json of the commit
+        stored: The commit's content paths, from commit_file_paths()
+    
+    Returns:
+        Mapping of file path (as listed in the commit) to permission bits
+    """
+    modes = meta.get("modes")
+    if modes is not None:
+        return modes
+    if meta.get("tree") is not None:
+        return {}
+    
+    found = {}
+    for file, path in stored.items():
+        try:
+            found[file] = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            continue
+    return found
+
+
 def write_head(commit_id: str):
     """Legacy function - write commit ID to HEAD"""
     repo = Repository()
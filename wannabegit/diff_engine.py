@@ -1,10 +1,16 @@
 """
 Advanced diff engine with color support and multiple diff formats
 """
+import sys
 import difflib
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Tuple, Union
 from enum import Enum
 
+try:
+    from cdifflib import CSequenceMatcher as SequenceMatcher
+except ImportError:  # Optional speedup; fall back to the pure-Python matcher
+    from difflib import SequenceMatcher
+
 
 class DiffFormat(Enum):
     """Supported diff output formats"""
@@ -27,28 +33,161 @@ class Colors:
     DIM = "\033[2m"
 
 
+# Output that is not going to a terminal gets no escape codes
+if sys.stdout is None or not sys.stdout.isatty():
+    for _name in ("RESET", "RED", "GREEN", "YELLOW", "BLUE", "MAGENTA", "CYAN", "BOLD", "DIM"):
+        setattr(Colors, _name, "")
+
+# Diff line colors by prefix, checked longest prefix first
+_HEADER_COLORS = {'+++': Colors.BOLD, '---': Colors.BOLD, '@@': Colors.CYAN}
+_LINE_COLORS = {'+': Colors.GREEN, '-': Colors.RED}
+
+
 def colorize_diff_line(line: str, use_color: bool = True) -> str:
-    """Add color to diff line based on prefix"""
+    """Add color to diff line based on prefix, using the prefix tables"""
     if not use_color:
         return line
     
-    if line.startswith('+') and not line.startswith('+++'):
-        return f"{Colors.GREEN}{line}{Colors.RESET}"
-    elif line.startswith('-') and not line.startswith('---'):
-        return f"{Colors.RED}{line}{Colors.RESET}"
-    elif line.startswith('@@'):
-        return f"{Colors.CYAN}{line}{Colors.RESET}"
-    elif line.startswith('+++') or line.startswith('---'):
-        return f"{Colors.BOLD}{line}{Colors.RESET}"
-    
+    color = (_HEADER_COLORS.get(line[:3]) or _HEADER_COLORS.get(line[:2])
+             or _LINE_COLORS.get(line[:1]))
+    if color:
+        return f"{color}{line}{Colors.RESET}"
     return line
 
 
+def _format_range(start: int, stop: int) -> str:
+    """Format a hunk line range the way unified diffs do"""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def _split_lines(text: str) -> List[str]:
+    """Split text into lines for diffing, ending the last one with a newline"""
+    lines = text.splitlines(keepends=True)
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    return lines
+
+
+def _grouped_opcodes(old_lines: List[str], new_lines: List[str],
+                     context_lines: int) -> Iterator[list]:
+    """
+    Group the edit opcodes into hunks
+    
+    The matcher may be the C implementation from cdifflib when it is
+    installed, and junk heuristics are off so long files with repeated
+    lines diff correctly.
+    """
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return matcher.get_grouped_opcodes(context_lines)
+
+
+def _iter_hunks(groups: Iterable[list], old_lines: List[str], new_lines: List[str],
+                fromfile: str, tofile: str) -> Iterator[str]:
+    """Yield unified diff lines for grouped opcodes, headers first"""
+    started = False
+    for group in groups:
+        if not started:
+            yield f"--- {fromfile}\n"
+            yield f"+++ {tofile}\n"
+            started = True
+        
+        first, last = group[0], group[-1]
+        yield f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@\n"
+        
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in old_lines[i1:i2]:
+                    yield ' ' + line
+                continue
+            if tag in ('replace', 'delete'):
+                for line in old_lines[i1:i2]:
+                    yield '-' + line
+            if tag in ('replace', 'insert'):
+                for line in new_lines[j1:j2]:
+                    yield '+' + line
+
+
+def unified_diff_lines(old_lines: List[str], new_lines: List[str],
+                       fromfile: str, tofile: str,
+                       context_lines: int = 3) -> Tuple[List[str], int, int]:
+    """
+    Build unified diff lines, counting added and removed lines on the way
+    
+    Produces the same output as difflib.unified_diff; the counts come
+    from the same opcodes the lines are built from.
+    
+    Returns:
+        Tuple of (diff lines, lines_added, lines_removed)
+    """
+    groups = list(_grouped_opcodes(old_lines, new_lines, context_lines))
+    diff_lines = list(_iter_hunks(groups, old_lines, new_lines, fromfile, tofile))
+    
+    added = 0
+    removed = 0
+    for group in groups:
+        for tag, i1, i2, j1, j2 in group:
+            if tag != 'equal':
+                added += j2 - j1
+                removed += i2 - i1
+    
+    return diff_lines, added, removed
+
+
+def iter_diff_lines(old_text: str, new_text: str,
+                    file_name: str = "file",
+                    use_color: bool = True,
+                    context_lines: int = 3) -> Iterator[str]:
+    """
+    Yield a colored unified diff one line at a time
+    
+    For callers that write the diff straight to the terminal: hunks are
+    produced as the matcher finds them, so the whole diff text is never
+    built. Each yielded line keeps its newline.
+    
+    Args:
+        old_text: Original text content
+        new_text: Modified text content
+        file_name: Name of file for diff headers
+        use_color: Whether to add ANSI color codes
+        context_lines: Number of context lines to show
+    """
+    old_lines = _split_lines(old_text)
+    new_lines = _split_lines(new_text)
+    lines = _iter_hunks(
+        _grouped_opcodes(old_lines, new_lines, context_lines),
+        old_lines, new_lines, f"a/{file_name}", f"b/{file_name}"
+    )
+    
+    if not (use_color and Colors.RESET):
+        yield from lines
+        return
+    
+    header_colors = _HEADER_COLORS
+    line_colors = _LINE_COLORS
+    reset = Colors.RESET
+    for line in lines:
+        color = (header_colors.get(line[:3]) or header_colors.get(line[:2])
+                 or line_colors.get(line[:1]))
+        if not color:
+            yield line
+        elif line.endswith('\n'):
+            yield f"{color}{line[:-1]}{reset}\n"
+        else:
+            yield f"{color}{line}{reset}"
+
+
 def generate_diff(old_text: str, new_text: str, 
                  file_name: str = "file",
                  format_type: DiffFormat = DiffFormat.UNIFIED,
                  use_color: bool = True,
-                 context_lines: int = 3) -> str:
+                 context_lines: int = 3,
+                 with_stats: bool = False) -> Union[str, Tuple[str, int, int]]:
     """
     Generate diff between two text strings with various format options
     
@@ -59,25 +198,22 @@ def generate_diff(old_text: str, new_text: str,
         format_type: Output format (unified, context, etc.)
         use_color: Whether to add ANSI color codes
         context_lines: Number of context lines to show
+        with_stats: Also return line counts; for unified diffs they are
+            counted while the diff is built instead of in a second pass
     
     Returns:
-        Formatted diff string
+        Formatted diff string, or (diff, lines_added, lines_removed) when
+        with_stats is set
     """
-    old_lines = old_text.splitlines(keepends=True)
-    new_lines = new_text.splitlines(keepends=True)
-    
-    # Add newlines if missing
-    if old_lines and not old_lines[-1].endswith('\n'):
-        old_lines[-1] += '\n'
-    if new_lines and not new_lines[-1].endswith('\n'):
-        new_lines[-1] += '\n'
+    old_lines = _split_lines(old_text)
+    new_lines = _split_lines(new_text)
     
     if format_type == DiffFormat.UNIFIED:
-        diff_lines = difflib.unified_diff(
+        diff_lines, added, removed = unified_diff_lines(
             old_lines, new_lines,
             fromfile=f"a/{file_name}",
             tofile=f"b/{file_name}",
-            n=context_lines
+            context_lines=context_lines
         )
         diff_text = "".join(diff_lines)
         
@@ -95,14 +231,28 @@ def generate_diff(old_text: str, new_text: str,
         diff_text = "".join(diff_lines)
         
     else:  # SIDE_BY_SIDE
-        return generate_side_by_side_diff(old_lines, new_lines, file_name)
+        diff_text = generate_side_by_side_diff(old_lines, new_lines, file_name)
+        use_color = False
     
-    # Apply color if requested
-    if use_color and diff_text:
-        lines = diff_text.split('\n')
-        colored_lines = [colorize_diff_line(line, use_color) for line in lines]
-        return '\n'.join(colored_lines)
+    if with_stats and format_type != DiffFormat.UNIFIED:
+        added, removed, _ = get_diff_stats(old_text, new_text)
     
+    # Apply color if requested, with one or two dict lookups per line
+    if use_color and diff_text and Colors.RESET:
+        header_colors = _HEADER_COLORS
+        line_colors = _LINE_COLORS
+        reset = Colors.RESET
+        colored_lines = []
+        for line in diff_text.split('\n'):
+            color = (header_colors.get(line[:3]) or header_colors.get(line[:2])
+                     or line_colors.get(line[:1]))
+            if color:
+                line = f"{color}{line}{reset}"
+            colored_lines.append(line)
+        diff_text = '\n'.join(colored_lines)
+    
+    if with_stats:
+        return diff_text, added, removed
     return diff_text
 
 
@@ -134,22 +284,24 @@ def get_diff_stats(old_text: str, new_text: str) -> Tuple[int, int, int]:
     """
     Calculate diff statistics
     
+    The counts are summed from the matcher's opcodes, which give the
+    same numbers as the unified diff from generate_diff without building
+    or scanning its text.
+    
     Returns:
         Tuple of (lines_added, lines_removed, lines_changed)
     """
     old_lines = old_text.splitlines()
     new_lines = new_text.splitlines()
     
-    diff = difflib.unified_diff(old_lines, new_lines, lineterm='')
-    
     added = 0
     removed = 0
     
-    for line in diff:
-        if line.startswith('+') and not line.startswith('+++'):
-            added += 1
-        elif line.startswith('-') and not line.startswith('---'):
-            removed += 1
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            added += j2 - j1
+            removed += i2 - i1
     
     changed = min(added, removed)
     
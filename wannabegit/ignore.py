@@ -4,8 +4,9 @@ Enhanced .wannabegitignore pattern matching with gitignore-style rules
 import os
 import fnmatch
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Set
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Set, Tuple
 
 IGNORE_FILE = ".wannabegitignore"
 
@@ -26,6 +27,12 @@ DEFAULT_IGNORE_PATTERNS = [
     ".*.swp",
 ]
 
+# Characters that make a pattern a glob rather than a literal name
+GLOB_CHARS = set("*?[")
+
+# Patterns use "/"; paths only need converting where the OS separator differs
+NATIVE_SEP = os.sep if os.sep != "/" else None
+
 
 class IgnorePattern:
     """Represents a single ignore pattern with parsing logic"""
@@ -44,6 +51,24 @@ class IgnorePattern:
         self.is_absolute = self.pattern.startswith("/")
         if self.is_absolute:
             self.pattern = self.pattern[1:]
+        
+        # Compiled once here rather than translated again on every match
+        self.basename_only = not self.is_absolute and "/" not in self.pattern
+        translated = fnmatch.translate(self.pattern)
+        if not self.is_absolute and not self.basename_only:
+            # Same as matching the pattern itself or "**/" + pattern
+            translated = "(?s:.*/)?" + translated
+        # Kept so PatternGroup can fuse patterns without translating again
+        self._translated = translated
+        self._regex = re.compile(translated)
+        
+        # Pick the matcher for this kind of pattern once, not on every call
+        if not self.basename_only:
+            self._match_fn = self._match_path
+        elif GLOB_CHARS.isdisjoint(self.pattern):
+            self._match_fn = self._match_name
+        else:
+            self._match_fn = self._match_basename
     
     def matches(self, path: str, is_dir: bool = False) -> bool:
         """Check if path matches this pattern"""
@@ -51,24 +76,79 @@ class IgnorePattern:
         if self.directory_only and not is_dir:
             return False
         
-        # Normalize path
-        path = path.replace("\\", "/")
-        
-        # Handle absolute patterns
-        if self.is_absolute:
-            return fnmatch.fnmatch(path, self.pattern)
+        if NATIVE_SEP:
+            path = path.replace(NATIVE_SEP, "/")
+        return self._match_fn(path)
+    
+    def _match_name(self, path: str) -> bool:
+        """Match a literal name against the basename of a normalized path"""
+        return path.rpartition("/")[2] == self.pattern
+    
+    def _match_basename(self, path: str) -> bool:
+        """Match a glob without a separator against the basename"""
+        return self._regex.match(path.rpartition("/")[2]) is not None
+    
+    def _match_path(self, path: str) -> bool:
+        """Match an anchored or multi-component pattern against the whole path"""
+        return self._regex.match(path) is not None
+
+
+# Parsed once at import and shared by every manager; patterns are never
+# modified after construction
+_DEFAULT_COMPILED = tuple(IgnorePattern(pattern) for pattern in DEFAULT_IGNORE_PATTERNS)
+
+
+class PatternGroup:
+    """
+    A run of ignore patterns fused into a few lookups
+    
+    Literal basenames go into sets and every glob of the same kind is
+    joined into a single alternation regex, so a path is checked with a
+    couple of lookups instead of one match per pattern.
+    """
+    
+    def __init__(self, patterns: List[IgnorePattern]):
+        # Index 0 holds patterns matching any path, index 1 directory-only ones
+        names: List[Set[str]] = [set(), set()]
+        basename_globs: List[List[str]] = [[], []]
+        path_globs: List[List[str]] = [[], []]
         
-        # Check if any part of the path matches
-        path_parts = path.split("/")
-        pattern_parts = self.pattern.split("/")
+        for pattern in patterns:
+            kind = 1 if pattern.directory_only else 0
+            
+            if not pattern.basename_only:
+                path_globs[kind].append(pattern._translated)
+            elif GLOB_CHARS.isdisjoint(pattern.pattern):
+                names[kind].add(pattern.pattern)
+            else:
+                basename_globs[kind].append(pattern._translated)
         
-        # If pattern has no directory separator, match against basename
-        if len(pattern_parts) == 1:
-            return fnmatch.fnmatch(os.path.basename(path), self.pattern)
+        self.names = names
+        self.basename_res = [self._fuse(globs) for globs in basename_globs]
+        self.path_res = [self._fuse(globs) for globs in path_globs]
+    
+    @staticmethod
+    def _fuse(translated: List[str]) -> Optional[Pattern]:
+        """Join translated globs into one compiled alternation"""
+        if not translated:
+            return None
+        return re.compile("|".join(f"(?:{t})" for t in translated))
+    
+    def matches(self, rel_path: str, basename: str, is_dir: bool) -> bool:
+        """Check a normalized relative path against any pattern of the group"""
+        for kind in ((0, 1) if is_dir else (0,)):
+            if basename in self.names[kind]:
+                return True
+            
+            basename_re = self.basename_res[kind]
+            if basename_re and basename_re.match(basename):
+                return True
+            
+            path_re = self.path_res[kind]
+            if path_re and path_re.match(rel_path):
+                return True
         
-        # Match full path
-        return fnmatch.fnmatch(path, self.pattern) or \
-               fnmatch.fnmatch(path, f"**/{self.pattern}")
+        return False
 
 
 class IgnoreManager:
@@ -76,100 +156,240 @@ class IgnoreManager:
     
     def __init__(self, repo_root: str = "."):
         self.repo_root = repo_root
+        self._root_is_cwd = os.path.normpath(repo_root) == os.curdir
+        self._root_prefix = os.path.join(os.path.abspath(repo_root), "")
         self.patterns: List[IgnorePattern] = []
+        # (path, is_dir) -> result of is_ignored
+        self._cache: Dict[Tuple[str, Optional[bool]], bool] = {}
+        # Relative directory path -> whether it or an ancestor is ignored
+        self._dir_cache: Dict[str, bool] = {}
         self._load_patterns()
+        self._compile_patterns()
     
     def _load_patterns(self):
         """Load patterns from .wannabegitignore file"""
         # Start with default patterns
-        for pattern in DEFAULT_IGNORE_PATTERNS:
-            self.patterns.append(IgnorePattern(pattern, self.repo_root))
+        self.patterns.extend(_DEFAULT_COMPILED)
         
-        # Load from file if exists
+        # Load from file if exists; opening it directly saves a stat call
         ignore_path = os.path.join(self.repo_root, IGNORE_FILE)
-        if os.path.exists(ignore_path):
-            try:
-                with open(ignore_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        # Skip empty lines and comments
-                        if line and not line.startswith("#"):
-                            self.patterns.append(
-                                IgnorePattern(line, self.repo_root)
-                            )
-            except IOError as e:
-                print(f"Warning: Could not read {ignore_path}: {e}")
-    
-    def is_ignored(self, path: str) -> bool:
-        """Check if path should be ignored"""
+        try:
+            with open(ignore_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    # Skip empty lines and comments
+                    if line and not line.startswith("#"):
+                        self.patterns.append(
+                            IgnorePattern(line, self.repo_root)
+                        )
+        except FileNotFoundError:
+            pass
+        except IOError as e:
+            print(f"Warning: Could not read {ignore_path}: {e}")
+    
+    def _compile_patterns(self):
+        """
+        Compile all patterns once into fused matchers
+        
+        Consecutive patterns of the same polarity form a group, and each
+        group is fused into a PatternGroup. Since the last matching pattern
+        decides, the groups are kept last first: the first group that
+        matches a path decides whether it is ignored.
+        """
+        groups: List[Tuple[bool, List[IgnorePattern]]] = []
+        for pattern in self.patterns:
+            if groups and groups[-1][0] == pattern.negation:
+                groups[-1][1].append(pattern)
+            else:
+                groups.append((pattern.negation, [pattern]))
+        
+        self._groups = [
+            (negation, PatternGroup(patterns)) for negation, patterns in reversed(groups)
+        ]
+    
+    def is_ignored(self, path: str, is_dir: Optional[bool] = None) -> bool:
+        """
+        Check if path should be ignored
+        
+        Results are cached per manager, so a path checked more than once
+        (such as a directory reached by several glob patterns) is matched
+        only once. Walks never descend into ignored directories, so paths
+        below one are not checked at all.
+        
+        Args:
+            path: Path to check
+            is_dir: Whether path is a directory, if the caller already knows;
+                otherwise it is looked up with a stat call
+        """
+        key = (path, is_dir)
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._cache[key] = self._is_ignored(path, is_dir)
+        return cached
+    
+    def _is_ignored(self, path: str, is_dir: Optional[bool]) -> bool:
+        """Match a path against the patterns, without the cache"""
         # Normalize path
         path = os.path.normpath(path)
-        is_dir = os.path.isdir(path)
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
         
-        # Make path relative to repo root
-        try:
-            rel_path = os.path.relpath(path, self.repo_root)
-        except ValueError:
+        # Make path relative to repo root; relpath() resolves both paths
+        # with getcwd() on every call, so the common cases strip a prefix
+        if not os.path.isabs(path) and self._root_is_cwd:
             rel_path = path
+        elif path.startswith(self._root_prefix):
+            rel_path = path[len(self._root_prefix):]
+        else:
+            try:
+                rel_path = os.path.relpath(path, self.repo_root)
+            except ValueError:
+                rel_path = path
         
-        # Check against patterns
-        ignored = False
-        for pattern in self.patterns:
-            if pattern.matches(rel_path, is_dir):
-                ignored = not pattern.negation
+        if NATIVE_SEP:
+            rel_path = rel_path.replace(NATIVE_SEP, "/")
+        parent, _, basename = rel_path.rpartition("/")
+        
+        # As in git, everything below an ignored directory is ignored, and
+        # the parent's answer is cached for all of its entries
+        if parent and self._dir_ignored(parent):
+            return True
         
-        return ignored
+        return self._match(rel_path, basename, is_dir)
+    
+    def _dir_ignored(self, rel_dir: str) -> bool:
+        """Check whether a relative directory or any of its ancestors is ignored"""
+        cached = self._dir_cache.get(rel_dir)
+        if cached is None:
+            parent, _, basename = rel_dir.rpartition("/")
+            cached = bool(parent and self._dir_ignored(parent)) or self._match(
+                rel_dir, basename, True
+            )
+            self._dir_cache[rel_dir] = cached
+        return cached
+    
+    def _match(self, rel_path: str, basename: str, is_dir: bool) -> bool:
+        """Match a normalized relative path against the pattern groups"""
+        # The last group with a matching pattern decides
+        for negation, group in self._groups:
+            if group.matches(rel_path, basename, is_dir):
+                return not negation
+        
+        return False
+    
+    def filter(self, paths: Iterable[str]) -> Iterator[str]:
+        """Yield only the paths that are not ignored"""
+        for path in paths:
+            if not self.is_ignored(path):
+                yield path
     
     def filter_files(self, files: List[str]) -> List[str]:
         """Filter out ignored files from list"""
-        return [f for f in files if not self.is_ignored(f)]
+        return list(self.filter(files))
     
     def get_tracked_files(self, directory: str = ".") -> List[str]:
-        """Get all non-ignored files in directory recursively"""
+        """
+        Get all non-ignored files in directory recursively
+        
+        Walks with os.scandir, whose entries know from the directory listing
+        whether they are directories, so the ignore checks need no stat
+        calls. Files come out in the same order as a top-down os.walk.
+        """
         tracked = []
+        stack = [directory]
         
-        for root, dirs, files in os.walk(directory):
-            # Filter out ignored directories
-            dirs[:] = [d for d in dirs if not self.is_ignored(os.path.join(root, d))]
+        while stack:
+            root = stack.pop()
+            subdirs = []
+            try:
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        
+                        if self.is_ignored(entry.path, is_dir=is_dir):
+                            continue
+                        
+                        if is_dir:
+                            # Like os.walk, do not follow directory symlinks
+                            if not entry.is_symlink():
+                                subdirs.append(entry.path)
+                        else:
+                            tracked.append(entry.path)
+            except OSError:
+                continue
             
-            # Add non-ignored files
-            for file in files:
-                filepath = os.path.join(root, file)
-                if not self.is_ignored(filepath):
-                    tracked.append(filepath)
+            stack.extend(reversed(subdirs))
         
         return tracked
 
 
+def _ignore_file_mtime() -> Optional[int]:
+    """Modification time of the ignore file, or None if there is none"""
+    try:
+        return os.stat(IGNORE_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+
 def load_ignore_patterns() -> List[str]:
     """Legacy function - load patterns from ignore file"""
-    if not os.path.exists(IGNORE_FILE):
-        return DEFAULT_IGNORE_PATTERNS.copy()
+    return list(_read_ignore_patterns(os.getcwd(), _ignore_file_mtime()))
+
+
+@lru_cache(maxsize=1)
+def _read_ignore_patterns(cwd: str, mtime_ns: Optional[int]) -> Tuple[str, ...]:
+    """
+    Read the ignore file's patterns
+    
+    Cached by working directory and the file's mtime, so the file is only
+    read again once it has changed.
+    """
+    if mtime_ns is None:
+        return tuple(DEFAULT_IGNORE_PATTERNS)
     
     patterns = DEFAULT_IGNORE_PATTERNS.copy()
     try:
-        with open(IGNORE_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    patterns.append(line)
+        # One bulk read, split afterwards, instead of iterating line by line
+        lines = Path(IGNORE_FILE).read_text(encoding="utf-8").splitlines()
     except IOError:
-        pass
+        lines = []
+    
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            patterns.append(line)
     
-    return patterns
+    return tuple(patterns)
+
+
+@lru_cache(maxsize=1)
+def _legacy_manager(cwd: str, mtime_ns: Optional[int]) -> IgnoreManager:
+    """IgnoreManager shared by legacy calls until the ignore file changes"""
+    return IgnoreManager()
 
 
 def is_ignored(filename: str) -> bool:
     """Legacy function - check if file is ignored"""
-    manager = IgnoreManager()
+    manager = _legacy_manager(os.getcwd(), _ignore_file_mtime())
     return manager.is_ignored(filename)
 
 
-def create_default_ignore_file():
-    """Create a default .wannabegitignore file"""
-    if os.path.exists(IGNORE_FILE):
-        return
+def clear_ignore_cache():
+    """
+    Drop the patterns and manager cached by the legacy functions
     
+    They are refreshed on their own when the ignore file's mtime changes;
+    this is for when it is rewritten without the mtime moving.
+    """
+    _read_ignore_patterns.cache_clear()
+    _legacy_manager.cache_clear()
+
+
+def create_default_ignore_file():
+    """Create a default .wannabegitignore file, keeping an existing one"""
     content = """# WannabeGit ignore file
 # Patterns follow gitignore syntax
 
@@ -205,9 +425,12 @@ build/
 # Add your custom patterns below
 """
     
+    # Exclusive creation checks for an existing file in the same call
     try:
-        with open(IGNORE_FILE, "w", encoding="utf-8") as f:
+        with open(IGNORE_FILE, "x", encoding="utf-8") as f:
             f.write(content)
         print(f"Created {IGNORE_FILE}")
+    except FileExistsError:
+        return
     except IOError as e:
         print(f"Warning: Could not create {IGNORE_FILE}: {e}")
\ No newline at end of file